@@ -0,0 +1,496 @@
+# benchmark harness: replays the simulator's media (or synthetic media if the files aren't
+# around) through the pipeline at a chosen pace and reports throughput & latency as json
+#   worker mode: VisionWorker / AudioWorker logic called in this process; no server, no
+#                queues, so it's the raw per frame / per chunk cost of the models
+#   e2e mode:    N websocket clients against a running server (python main.py); latency &
+#                throughput come from diffing the server's /metrics before & after the run
+# pacing: "realtime", "<N>x" (e.g. 4x) or "max" (unthrottled)
+#
+#   python -m api.benchmark --mode worker --stream vision --pace max --seconds 20
+#   python -m api.benchmark --mode e2e --clients 4 --pace 2x --out bench.json
+#
+# json goes to stdout (or --out) so runs can be diffed across commits
+
+import argparse
+import asyncio
+import json
+import os
+import queue
+import re
+import subprocess
+import time
+import urllib.error
+import urllib.request
+import wave
+
+import cv2
+import numpy as np
+
+from core import config, events, protocol
+
+METRICS_URL = f"http://localhost:{config.PORT}/metrics"
+READY_URL = f"http://localhost:{config.PORT}/ready"
+METRIC_PREFIX = "glasses_"
+
+
+# --- media ---
+
+
+def load_frames(limit: int):
+    # jpeg bytes, encoded up front so encoding never counts against the pipeline
+    cap = cv2.VideoCapture(config.TARGET_VIDEO)
+    frames = []
+    fps = config.FPS
+    if cap.isOpened():
+        fps = cap.get(cv2.CAP_PROP_FPS) or config.FPS
+        while len(frames) < limit:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(cv2.imencode(".jpg", frame)[1].tobytes())
+        cap.release()
+
+    if not frames:
+        # no clip; slide the still image around so the tracker still has work to do
+        print(f"[Benchmark] {config.TARGET_VIDEO} not found; using synthetic frames")
+        w, h = config.RESOLUTION
+        still = cv2.imread(config.WARMUP_IMAGE)
+        if still is None:
+            still = np.random.randint(0, 256, (h, w, 3), dtype=np.uint8)
+        still = cv2.resize(still, (w, h))
+        for i in range(min(limit, 2 * config.FPS)):
+            frame = np.roll(still, shift=(i * 4, i * 8), axis=(0, 1))
+            frames.append(cv2.imencode(".jpg", frame)[1].tobytes())
+    return frames, fps
+
+
+def load_audio() -> bytes:
+    # pcm16 mono at config.SAMPLE_RATE, same as what the simulator sends
+    if os.path.exists(config.TARGET_AUDIO):
+        with wave.open(config.TARGET_AUDIO, "rb") as wf:
+            if (
+                wf.getnchannels() == config.CHANNELS
+                and wf.getsampwidth() == config.SAMPLE_WIDTH
+            ):
+                return wf.readframes(wf.getnframes())
+
+    # tone bursts with pauses: enough for the vad to open & close utterances
+    print(f"[Benchmark] {config.TARGET_AUDIO} not usable; using synthetic audio")
+    rate = config.SAMPLE_RATE
+    t = np.arange(int(rate * 2.5)) / rate
+    burst = 0.3 * np.sin(2 * np.pi * 180 * t) * (1 + np.sin(2 * np.pi * 3 * t)) / 2
+    pause = np.zeros(int(rate * 1.5))
+    audio = np.concatenate([burst, pause] * 4)
+    audio += 0.005 * np.random.randn(len(audio))
+    return (np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes()
+
+
+def audio_chunks(pcm: bytes):
+    chunk_bytes = config.CHUNK_SIZE * config.CHANNELS * config.SAMPLE_WIDTH
+    usable = len(pcm) - len(pcm) % chunk_bytes
+    return [pcm[i : i + chunk_bytes] for i in range(0, usable, chunk_bytes)]
+
+
+# --- pacing & stats ---
+
+
+def parse_pace(pace: str):
+    # speed multiplier over real time; None = unthrottled
+    if pace == "max":
+        return None
+    if pace == "realtime":
+        return 1.0
+    if pace.endswith("x"):
+        return float(pace[:-1])
+    raise argparse.ArgumentTypeError(f"bad pace {pace!r}; use realtime, <N>x or max")
+
+
+class Pacer:
+    # media time -> wall time; returns the wall clock time the item was due, which is what
+    # the pipeline sees as capture time
+    def __init__(self, speed):
+        self.speed = speed
+        self.start = time.time()
+
+    def due(self, media_t: float) -> float:
+        if self.speed is None:
+            return time.time()
+        return self.start + media_t / self.speed
+
+    def wait(self, media_t: float) -> float:
+        due = self.due(media_t)
+        time.sleep(max(0.0, due - time.time()))
+        return due
+
+    async def async_wait(self, media_t: float) -> float:
+        due = self.due(media_t)
+        await asyncio.sleep(max(0.0, due - time.time()))
+        return due
+
+
+def percentiles(values) -> dict:
+    # milliseconds
+    if not values:
+        return {}
+    arr = np.asarray(values) * 1000
+    return {
+        "p50": round(float(np.percentile(arr, 50)), 2),
+        "p90": round(float(np.percentile(arr, 90)), 2),
+        "p99": round(float(np.percentile(arr, 99)), 2),
+        "max": round(float(arr.max()), 2),
+        "mean": round(float(arr.mean()), 2),
+    }
+
+
+def stage_means(snapshot: dict) -> dict:
+    # mean ms per instrumented stage from a worker's Metrics snapshot
+    return {
+        key: round(h["sum"] / h["count"] * 1000, 3)
+        for key, h in snapshot["histograms"].items()
+        if h["count"]
+    }
+
+
+# --- worker mode ---
+
+
+def bench_vision_worker(args, speed) -> dict:
+    from workers.vision import VisionWorker
+
+    frames, fps = load_frames(int(args.seconds * config.FPS) + 1)
+    out = queue.Queue()
+    worker = VisionWorker(None, out, queue.Queue())
+    worker.setup()
+    worker.mark_ready()  # resets metrics after warmup
+
+    n_frames = int(args.seconds * fps)
+    latencies = []  # frame due -> handled (result sent or, in delta mode, suppressed)
+    result_events = 0
+    pacer = Pacer(speed)
+    start = time.perf_counter()
+    for i in range(n_frames):
+        due = pacer.wait(i / fps)
+        for client in range(args.clients):
+            # each client's frame is stamped when it's handed over; with one shared due time
+            # the later clients' frames aged past VISION_MAX_FRAME_AGE waiting behind the
+            # earlier ones and got dropped as stale instead of measured
+            worker._handle_frame(None, client + 1, time.time(), frames[i % len(frames)])
+            latencies.append(time.time() - due)
+        while not out.empty():
+            result_events += isinstance(out.get_nowait(), bytes)  # encoded vision_result
+    elapsed = time.perf_counter() - start
+
+    snapshot = worker.metrics.snapshot()
+    processed = snapshot["counters"].get('vision_frames_total{outcome="processed"}', 0)
+    for state in worker.sessions.values():
+        state["tracker"].release()
+    return {
+        "frames_sent": n_frames * args.clients,
+        "frames_processed": processed,
+        "result_events": result_events,
+        "fps": round(processed / elapsed, 2),
+        "source_fps": fps,
+        "latency_ms": percentiles(latencies),
+        "stages_ms": stage_means(snapshot),
+        "counters": snapshot["counters"],
+        "elapsed_s": round(elapsed, 3),
+    }
+
+
+def bench_audio_worker(args, speed) -> dict:
+    from workers.audio import AudioWorker
+
+    chunks = audio_chunks(load_audio())
+    chunk_duration = config.CHUNK_SIZE / config.SAMPLE_RATE
+    out = queue.Queue()
+    worker = AudioWorker(None, out, queue.Queue())
+    worker.setup()
+    worker.mark_ready()
+    worker.start_pipeline()
+
+    n_chunks = int(args.seconds / chunk_duration)
+    for client in range(args.clients):
+        worker.sessions[client + 1] = worker._new_session_state()
+
+    latencies = []  # message due -> through the vad/ingest stage
+    busy = 0.0
+    pacer = Pacer(speed)
+    start = time.perf_counter()
+    for i in range(n_chunks):
+        ts = pacer.wait(i * chunk_duration)
+        for client in range(args.clients):
+            t0 = time.perf_counter()
+            worker._handle_audio(
+                client + 1, worker.sessions[client + 1], chunks[i % len(chunks)], ts
+            )
+            busy += time.perf_counter() - t0
+            latencies.append(time.time() - ts)
+    for client in range(args.clients):  # flush sentences still open
+        worker._close_session(client + 1)
+    worker.handoff.join()  # asr stage catches up on whatever is still handed off
+    elapsed = time.perf_counter() - start
+    worker.stop_pipeline()
+
+    speech = []
+    while not out.empty():
+        item = out.get_nowait()
+        if isinstance(item, bytes):  # stats events stay dicts
+            speech.append(events.decode(item))
+    audio_seconds = n_chunks * chunk_duration * args.clients
+    snapshot = worker.metrics.snapshot()
+    asr_busy = snapshot["histograms"]["audio_asr_stage_seconds"]["sum"]
+    return {
+        "audio_seconds": round(audio_seconds, 2),
+        # processing time / audio time per stage; the slower one has to stay under 1
+        "rtf": round(max(busy, asr_busy) / audio_seconds, 4),
+        "rtf_ingest": round(busy / audio_seconds, 4),
+        "rtf_asr": round(asr_busy / audio_seconds, 4),
+        "speedup": round(audio_seconds / elapsed, 2),
+        "utterances": sum(event.final for event in speech),
+        "latency_ms": percentiles(latencies),
+        "stages_ms": stage_means(snapshot),
+        "counters": snapshot["counters"],
+        "elapsed_s": round(elapsed, 3),
+    }
+
+
+# --- e2e mode ---
+
+
+def scrape(url=METRICS_URL) -> dict:
+    # prometheus text -> name -> [(labels, value)], prefix stripped
+    samples = {}
+    with urllib.request.urlopen(url) as resp:
+        text = resp.read().decode()
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        key, value = line.rsplit(" ", 1)
+        name, _, labels = key.partition("{")
+        samples.setdefault(name.removeprefix(METRIC_PREFIX), []).append(
+            (dict(re.findall(r'(\w+)="([^"]*)"', labels)), float(value))
+        )
+    return samples
+
+
+def _sum(samples, name, **match) -> float:
+    return sum(
+        v
+        for labels, v in samples.get(name, [])
+        if all(labels.get(k) == want for k, want in match.items())
+    )
+
+
+def counter_delta(before, after, name, **match) -> float:
+    return _sum(after, name, **match) - _sum(before, name, **match)
+
+
+def histogram_delta(before, after, name) -> dict:
+    # percentiles over the run, summed across workers; linear within a bucket so they're
+    # only as fine as the bucket edges
+    count = counter_delta(before, after, f"{name}_count")
+    if count <= 0:
+        return {}
+    mean = counter_delta(before, after, f"{name}_sum") / count
+
+    edges = sorted(
+        {labels["le"] for labels, _ in after.get(f"{name}_bucket", [])},
+        key=lambda le: float("inf") if le == "+Inf" else float(le),
+    )
+    cumulative = [counter_delta(before, after, f"{name}_bucket", le=le) for le in edges]
+
+    def pct(q):
+        target = q * count
+        lower_edge, lower_count = 0.0, 0.0
+        for le, c in zip(edges, cumulative):
+            upper = float("inf") if le == "+Inf" else float(le)
+            if c >= target:
+                if upper == float("inf") or c == lower_count:
+                    return lower_edge
+                frac = (target - lower_count) / (c - lower_count)
+                return lower_edge + frac * (upper - lower_edge)
+            lower_edge, lower_count = upper, c
+        return lower_edge
+
+    return {
+        "p50": round(pct(0.5) * 1000, 2),
+        "p90": round(pct(0.9) * 1000, 2),
+        "p99": round(pct(0.99) * 1000, 2),
+        "mean": round(mean * 1000, 2),
+        "count": int(count),
+    }
+
+
+async def wait_for_server(timeout=config.READY_TIMEOUT):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(READY_URL):
+                return
+        except (urllib.error.URLError, ConnectionError):  # 503 while loading counts here too
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"server at {READY_URL} not ready after {timeout}s")
+
+
+async def e2e_client(frames, fps, chunks, args, speed) -> dict:
+    import websockets
+
+    from api.simulator import encode_message
+
+    sent = {"frames": 0, "audio_chunks": 0}
+    chunk_duration = config.CHUNK_SIZE / config.SAMPLE_RATE
+
+    async with websockets.connect(config.SERVER_URL, max_size=None) as websocket:
+
+        async def vision():
+            pacer = Pacer(speed)
+            for i in range(int(args.seconds * fps)):
+                ts = await pacer.async_wait(i / fps)
+                message = encode_message(
+                    protocol.STREAM_VISION, protocol.CODEC_JPEG, i + 1, ts, frames[i % len(frames)]
+                )
+                await websocket.send(message)
+                sent["frames"] += 1
+                if speed is None:
+                    await asyncio.sleep(0)  # let the audio task interleave
+
+        async def audio():
+            pacer = Pacer(speed)
+            for i in range(int(args.seconds / chunk_duration)):
+                ts = await pacer.async_wait(i * chunk_duration)
+                message = encode_message(
+                    protocol.STREAM_AUDIO, protocol.CODEC_PCM16, i + 1, ts, chunks[i % len(chunks)]
+                )
+                await websocket.send(message)
+                sent["audio_chunks"] += 1
+                if speed is None:
+                    await asyncio.sleep(0)
+
+        tasks = []
+        if args.stream in ("vision", "both"):
+            tasks.append(vision())
+        if args.stream in ("audio", "both"):
+            tasks.append(audio())
+        await asyncio.gather(*tasks)
+    return sent
+
+
+async def bench_e2e(args, speed) -> dict:
+    await wait_for_server()
+    frames, fps = load_frames(int(args.seconds * config.FPS) + 1)
+    chunks = audio_chunks(load_audio())
+
+    before = scrape()
+    start = time.perf_counter()
+    sent = await asyncio.gather(
+        *(e2e_client(frames, fps, chunks, args, speed) for _ in range(args.clients))
+    )
+    send_elapsed = time.perf_counter() - start
+    # workers are still chewing on the tail; give them a moment
+    await asyncio.sleep(args.drain)
+    window = time.perf_counter() - start  # sending + drain; throughput is measured over this
+    # ...then one metrics interval so the workers' last snapshots reach /metrics
+    await asyncio.sleep(config.METRICS_INTERVAL)
+    elapsed = time.perf_counter() - start
+    after = scrape()
+
+    frames_sent = sum(s["frames"] for s in sent)
+    audio_seconds = sum(s["audio_chunks"] for s in sent) * config.CHUNK_SIZE / config.SAMPLE_RATE
+    processed = counter_delta(before, after, "vision_frames_total", outcome="processed")
+    outcomes = {
+        outcome: int(counter_delta(before, after, "vision_frames_total", outcome=outcome))
+        for outcome in ("processed", "skipped", "stale", "torn", "undecodable")
+    }
+    # asr thread is the bottleneck stage; ingest/vad is a small fraction of it
+    audio_busy = counter_delta(before, after, "audio_asr_stage_seconds_sum")
+
+    return {
+        "frames_sent": frames_sent,
+        "frames": outcomes,
+        "fps": round(processed / window, 2),
+        "send_fps": round(frames_sent / send_elapsed, 2),
+        "audio_seconds": round(audio_seconds, 2),
+        "rtf": round(audio_busy / audio_seconds, 4) if audio_seconds else None,
+        "ingest_dropped": {
+            stream: int(counter_delta(before, after, "ingest_dropped_total", stream=stream))
+            for stream in ("vision", "audio")
+        },
+        "latency_ms": {
+            name: histogram_delta(before, after, name)
+            for name in (
+                "vision_latency_seconds",
+                "vision_queue_wait_seconds",
+                "vision_frame_seconds",
+                "vision_detect_seconds",
+                "audio_queue_wait_seconds",
+                "audio_message_seconds",
+                "audio_handoff_block_seconds",
+                "audio_asr_stage_seconds",
+                "audio_asr_seconds",
+                "audio_sentence_end_seconds",
+                "coordinator_event_seconds",
+            )
+        },
+        "window_s": round(window, 3),
+        "elapsed_s": round(elapsed, 3),
+    }
+
+
+# --- entry ---
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pipeline throughput & latency benchmark")
+    parser.add_argument("--mode", choices=("worker", "e2e"), default="worker")
+    parser.add_argument("--stream", choices=("vision", "audio", "both"), default="both")
+    parser.add_argument("--pace", default="max", help="realtime, <N>x or max")
+    parser.add_argument("--clients", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=20.0, help="media seconds per client")
+    parser.add_argument("--drain", type=float, default=2.0, help="e2e: wait after sending")
+    parser.add_argument("--out", help="write json here instead of stdout")
+    args = parser.parse_args()
+    speed = parse_pace(args.pace)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "mode": args.mode,
+        "stream": args.stream,
+        "pace": args.pace,
+        "clients": args.clients,
+        "seconds": args.seconds,
+        "config": {
+            "vision_transport": config.VISION_TRANSPORT,
+            "vision_workers": config.VISION_WORKERS,
+            "audio_workers": config.AUDIO_WORKERS,
+            "vad_engine": config.VAD_ENGINE,
+        },
+    }
+    if args.mode == "e2e":
+        report["e2e"] = asyncio.run(bench_e2e(args, speed))
+    else:
+        if args.stream in ("vision", "both"):
+            report["vision"] = bench_vision_worker(args, speed)
+        if args.stream in ("audio", "both"):
+            report["audio"] = bench_audio_worker(args, speed)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+        print(f"[Benchmark] wrote {args.out}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 # define endpoints
 
-from fastapi import APIRouter, WebSocket
+import time
 
-from core import config
+from fastapi import APIRouter, Request, WebSocket
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from core import config, protocol
 
 router = APIRouter()
 
@@ -14,10 +17,29 @@ router = APIRouter()
 @router.websocket("/stream")
 async def stream_ingest(websocket: WebSocket):
     await websocket.accept()
-    print("Client connected to stream endpoint")
 
     system = websocket.app.state.system
 
+    # hold off reading until the models are loaded; meanwhile the client's messages back up
+    # in the socket instead of filling worker queues that nobody is draining yet
+    if not await system.wait_ready(timeout=config.READY_TIMEOUT):
+        failed = system.failed_workers()
+        if failed:
+            print(f"Workers died during startup {failed}; turning client away")
+            await websocket.close(code=1011)  # server error; retrying won't help
+        else:
+            print("Workers not ready in time; turning client away")
+            await websocket.close(code=1013)  # try again later
+        return
+
+    session = system.open_session()  # picks which vision/audio worker gets this stream
+    print(f"Client connected to stream endpoint (session {session})")
+
+    # per connection wire stats; seq gaps mean the glasses (or network) dropped something
+    last_seq = {}
+    wire_stats = {"lost": 0, "out_of_order": 0}
+    clock = protocol.ClockOffset()  # glasses clock -> server clock
+
     try:
         while True:
             data = await websocket.receive_bytes()
@@ -25,17 +47,62 @@ async def stream_ingest(websocket: WebSocket):
                 continue
 
             # get data type & put into respective queues
-            header = data[0:1]
-            payload = data[1:]
-            if header == config.HEADER_VISION:
-                system.vision_queue.put(payload)
-            elif header == config.HEADER_AUDIO:
-                system.audio_queue.put(payload)
+            try:
+                header, payload = protocol.parse(data)
+            except ValueError as e:
+                print(f"Bad message: {e}")
+                continue
+
+            if header.seq is not None:
+                prev = last_seq.get(header.stream)
+                if prev is not None and header.seq <= prev:
+                    # stale vision frame is useless; audio still goes through in order received
+                    wire_stats["out_of_order"] += 1
+                    if header.stream == protocol.STREAM_VISION:
+                        continue
+                else:
+                    if prev is not None:
+                        wire_stats["lost"] += header.seq - prev - 1
+                    last_seq[header.stream] = header.seq
+
+            capture_ts = None  # ingest falls back to arrival time
+            if config.TRUST_CAPTURE_TIME and header.capture_ts is not None:
+                capture_ts = clock.normalize(header.capture_ts, time.time())
+
+            # overflow policy per stream lives in SharedMem.ingest; doesn't stall the loop
+            if header.stream == protocol.STREAM_VISION:
+                await system.ingest(session, "vision", payload, capture_ts)
+            elif header.stream == protocol.STREAM_AUDIO:
+                await system.ingest(session, "audio", payload, capture_ts)
             else:
-                print("Unkonwn header type")
+                print("Unkonwn stream type")
 
     except Exception:
         pass
+    finally:
+        system.close_session(session)
+        print(
+            f"Client disconnected (session {session}); "
+            f"lost {wire_stats['lost']}, out of order {wire_stats['out_of_order']}"
+        )
+        if clock.offset is not None:
+            print(f"Session {session} clock offset {clock.offset:+.3f}s (server - glasses)")
+
+
+@router.get("/ready")
+async def ready(request: Request):
+    # 200 once every worker has loaded its models, 503 before; body has startup timings
+    status = request.app.state.system.readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@router.get("/metrics")
+async def metrics(request: Request):
+    # prometheus text format; per stage latency histograms from every worker + queue depths
+    return PlainTextResponse(
+        request.app.state.system.render_metrics(),
+        media_type="text/plain; version=0.0.4",
+    )
 
 
 def setup_routes(app):
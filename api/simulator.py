@@ -1,12 +1,22 @@
 import asyncio
 import os
+import random
 import time
 import wave
 
 import cv2
 import websockets
 
-from core import config
+from core import config, protocol
+
+# client side id carried in the v2 header; the server still assigns its own session
+CLIENT_SESSION = random.getrandbits(32)
+
+
+def encode_message(stream, codec, seq, capture_ts, payload) -> bytes:
+    if config.PROTOCOL_VERSION == protocol.LEGACY_VERSION:
+        return protocol.pack_legacy(stream, payload)
+    return protocol.pack(stream, codec, CLIENT_SESSION, seq, capture_ts, payload)
 
 
 # defining vision
@@ -25,6 +35,7 @@ async def vision_stream(websocket):
     frame_delay = 1.0 / fps if fps > 0 else config.FRAME_DELAY
     print(f"Video streaming at {fps if fps > 0 else 'default'} FPS")
 
+    seq = 0
     try:
         while True:
             start_time = time.time()
@@ -44,9 +55,18 @@ async def vision_stream(websocket):
                 continue
 
             image_bytes = buffer.tobytes()
+            seq += 1
 
             try:
-                await websocket.send(config.HEADER_VISION + image_bytes)
+                await websocket.send(
+                    encode_message(
+                        protocol.STREAM_VISION,
+                        protocol.CODEC_JPEG,
+                        seq,
+                        start_time,
+                        image_bytes,
+                    )
+                )
             except websockets.exceptions.ConnectionClosed:
                 print("Vision stream connection closed by server")
                 break
@@ -82,6 +102,7 @@ async def audio_stream(websocket):
 
         print(f"Audio streaming at {config.SAMPLE_RATE}Hz")
 
+        seq = 0
         try:
             while True:
                 start_time = time.time()
@@ -91,8 +112,17 @@ async def audio_stream(websocket):
                     wf.rewind()
                     data = wf.readframes(config.CHUNK_SIZE)
 
+                seq += 1
                 try:
-                    await websocket.send(config.HEADER_AUDIO + data)
+                    await websocket.send(
+                        encode_message(
+                            protocol.STREAM_AUDIO,
+                            protocol.CODEC_PCM16,
+                            seq,
+                            start_time,
+                            data,
+                        )
+                    )
                 except websockets.exceptions.ConnectionClosed:
                     print("audio stream connection closed by server")
                     break
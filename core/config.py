@@ -8,14 +8,54 @@ HOST = "0.0.0.0"
 PORT = 8000
 SERVER_URL = f"ws://localhost:{PORT}/stream"
 
+# legacy single byte headers; see core/protocol.py for the v2 header
 HEADER_VISION = b"\x01"
 HEADER_AUDIO = b"\x02"
+PROTOCOL_VERSION = 2  # what the simulator speaks; server accepts 1 and 2
+# frame age from the client's capture time (mapped onto the server clock per connection, see
+# protocol.ClockOffset); False = arrival time
+TRUST_CAPTURE_TIME = True
 
 RESOLUTION = (1280, 720)
 FPS = 15
 FRAME_DELAY = 1.0 / FPS
 TARGET_VIDEO = "./api/Friends_Clip.mp4"
 
+# synthetic frames/audio pushed through every model at startup so the first real request
+# doesn't pay graph init / allocator costs
+WARMUP_ENABLED = True
+WARMUP_ITERATIONS = 3
+# has to show a face or face_feature_extract / the crop session never run during warmup; the
+# default is a 1280x720 frame around a public domain NASA portrait (scikit-image sample data)
+# if it's missing: first frame of TARGET_VIDEO, then random noise
+WARMUP_IMAGE = os.getenv("WARMUP_IMAGE", "./api/warmup_face.jpg")
+WARMUP_REQUIRE_FACE = os.getenv("WARMUP_REQUIRE_FACE", "0") == "1"  # no face -> fail startup
+
+# seconds a new websocket waits for workers to finish loading before being turned away
+READY_TIMEOUT = 120.0
+
+# per stage latency histograms / counters; workers push a snapshot to the parent this often
+METRICS_INTERVAL = 2.0
+
+# worker pools; each websocket session is pinned to one worker of each kind
+VISION_WORKERS = int(os.getenv("VISION_WORKERS", "1"))
+AUDIO_WORKERS = int(os.getenv("AUDIO_WORKERS", "1"))
+# seconds a worker remembers a closed session, to drop frames/audio still queued behind the
+# close; long enough to cover a full input queue, short enough not to pile up
+CLOSED_SESSION_GRACE = 30.0
+
+# how frames get from the route to the vision worker
+VISION_TRANSPORT = "shm"  # "shm" for shared mem ring buffer, "queue" for plain mp.Queue
+FRAME_RING_SLOTS = 16  # ~1s of 15fps video before the oldest frame gets overwritten
+FRAME_RING_SLOT_BYTES = 1 << 20  # 1MB per slot; 720p jpegs are usually well under
+
+# what the route does when a worker's input queue is full
+# "drop_oldest": evict the stalest item, "block": never drop (waits off the event loop),
+# "wait": wait up to QUEUE_WAIT_TIMEOUT then drop the new item
+VISION_QUEUE_POLICY = "drop_oldest"  # ring transport always drops oldest anyway
+AUDIO_QUEUE_POLICY = "block"  # losing speech is worse than a bit of lag
+QUEUE_WAIT_TIMEOUT = 0.1
+
 # model for face rec
 DEFAULT_ISF_MODEL = os.getenv("DEFAULT_ISF_MODEL", "Megatron")
 MEGATRON_MODEL_PATH = os.getenv("MEGATRON_MODEL_PATH", "")
@@ -28,6 +68,35 @@ def get_model_path(model_type):
     return PIKACHU_MODEL_PATH
 
 
+# vision worker frame scheduling
+VISION_LATEST_FRAME_ONLY = True  # drain the input and only run detection on the newest frame
+VISION_MAX_FRAME_AGE = 0.5  # seconds; older frames are dropped without running detection
+VISION_STATS_INTERVAL = 5.0  # seconds between vision_stats events
+# jpeg decode at 1/N scale (1, 2, 4 or 8) for detection; libjpeg skips most of the idct
+# so it's much cheaper than a full decode + resize. bboxes are scaled back to full res
+VISION_DECODE_SCALE = 2
+# with a reduced decode: embed faces from a full res crop (decoded only when a face is due
+# for recognition) instead of the reduced frame
+VISION_EMBED_FULL_RES = True
+VISION_CROP_PAD = 0.3  # fraction of the bbox added on every side of a recognition crop
+# seconds between retries for a track nobody recognized yet (known tracks are rechecked every
+# 2s); retries embed off the detection frame, a new track's first check uses the full res crop
+VISION_UNKNOWN_RECHECK = 0.5
+# motion gating: skip detection while the scene barely changes & reuse the last faces
+VISION_MOTION_GATING = True
+VISION_MOTION_THUMB = (32, 18)  # grayscale thumbnail size (w, h) compared between frames
+VISION_MOTION_THRESHOLD = 0.02  # mean abs thumbnail difference (0-1) that counts as motion
+VISION_MOTION_REFRESH = 0.5  # seconds; detection always runs at least this often
+# vision_result events: "delta" only sends tracks that appeared, changed name or moved (plus
+# removed track ids) and a full keyframe every so often; "full" sends every frame
+VISION_RESULT_MODE = "delta"
+VISION_KEYFRAME_INTERVAL = 2.0  # seconds between full keyframes in delta mode
+VISION_MOVE_IOU = 0.7  # a track counts as moved once its box overlaps the last sent one less
+VISION_SEND_EMBEDDINGS = False  # face embeddings in results; can be toggled by command
+
+# known faces persist here (memmapped rows + json index); "" keeps the gallery in memory only
+FACE_GALLERY_DIR = os.getenv("FACE_GALLERY_DIR", "workers/vision_utils/face_gallery")
+
 CONFIDENCE_THRESHOLD_DETECTION = 0.5
 CONFIDENCE_THRESHOLD_MATCHING = 0.5
 
@@ -46,13 +115,52 @@ AUDIO_SAMPLE_RATE_HZ = 16000
 
 UNKNOWN_SPEAKER = "Unknown"
 
+# audio buffers are preallocated per session; a sentence longer than this gets cut
+MAX_UTTERANCE_S = 30
+# speech chunks that can queue between the vad/ingest thread and the asr thread; bursts up
+# to this long don't stall ingest, beyond it ingest waits for asr (bounded memory)
+ASR_HANDOFF_CHUNKS = 16
+
 # Streaming context, defaults used in parakeet readme
 CONTEXT_LEFT = 64  # 256 default both
 CONTEXT_RIGHT = 64
 
 # variables for checking if a person stopped talking
 SPEECH_CHUNK_SIZE = 1  # each chunk is 0.8 seconds so 3 chunks means they stop speaking for 2.4 seconds to signify a sentence break
-LOUDNESS_THRESHOLD = 0.01  # how quiet it needs to be to signify stop talking, can tune this when we get mic based on backround noise
+LOUDNESS_THRESHOLD = 0.01  # used by VAD_ENGINE="rms"; how quiet it needs to be to signify stop talking, can tune this when we get mic based on backround noise
+
+# voice activity detection; decides which chunks are worth sending to parakeet
+VAD_ENGINE = "spectral"  # "spectral" (frame level, adaptive) or "rms" (old single threshold)
+VAD_FRAME_MS = 20
+VAD_ENTER_DB = 9.0  # frame must be this far over the noise floor to start speech
+VAD_EXIT_DB = 5.0  # ...and drop under this to end it (hysteresis)
+VAD_MIN_DB = -50.0  # absolute speech band energy (dBFS) below which nothing is speech
+VAD_HANGOVER_FRAMES = 10  # keep speech on 200ms after the last loud frame
+VAD_MIN_SPEECH_RATIO = 0.2  # fraction of speech frames for a chunk to count as speech
+VAD_ADAPT_NOISE_FLOOR = True
+VAD_NOISE_FLOOR_DB = -60.0  # starting (or fixed, if not adapting) noise floor
+VAD_NOISE_WINDOW_MS = 3000  # floor = quietest frame in this window
+AUDIO_STATS_INTERVAL = 5.0  # seconds between audio_stats events
 
 # voice diartization
+SPEAKER_EMBEDDINGS_DICT = "workers/audio_utils/EmbeddingDict.json"  # name -> list of .npy files
+SPEAKER_BANK_DIR = "workers/audio_utils/speaker_bank"  # compiled centroids; rebuilt when the above changes
 SIMILARITY_THRESHOLD = 0.55
+SPEAKER_STICKINESS = 0.02  # score bonus for the previous speaker when ranking candidates
+
+# speaker embeddings over sliding windows while someone is still talking; gives an early
+# speaker guess & keeps the end of sentence ReDimNet pass to at most one window
+STREAMING_SPEAKER_EMBEDDINGS = True
+SPEAKER_WINDOW_S = 2.0
+SPEAKER_HOP_S = 1.2  # should be a multiple of the chunk size to line up with chunks
+
+# interim transcripts: final=False speech events with the text so far while someone's still
+# talking; only sent when the text changed, and at most this many per second per session
+INTERIM_TRANSCRIPTS = True
+INTERIM_MAX_RATE_HZ = 2.0
+
+# coordinator fusion: which faces were on screen while someone was talking
+FUSION_STORE_SECONDS = 120.0  # how far back the event store keeps events per session
+FUSION_STORE_MAX_EVENTS = 4096  # ...and at most this many per session & stream
+FUSION_VISION_HOLD = 3.0  # seconds a vision event counts as current with nothing newer (> keyframe interval)
+FUSION_MIN_VISIBLE = 0.5  # fraction of an utterance a face has to be on screen to be a candidate
@@ -0,0 +1,177 @@
+# results_queue event schema: workers -> coordinator
+#
+# vision_result & speech are slotted dataclasses, sent as compact little endian bytes
+# instead of pickled dicts; embeddings travel as raw float32 and come back as read-only
+# np.frombuffer views, so there's no ndarray pickling on either end
+#
+# every message: version u8 | kind u8, then the kind's body
+#   vision_result: session u32 | timestamp f64 | keyframe u8 | faces u16 | removed u16
+#                  | removed track ids i32 * removed
+#                  | per face: track_id i32 | bbox i32 * 4 | score f32 | name_len u16
+#                              | emb_dim u16 | name utf8 | emb f32 * emb_dim
+#   speech:        session u32 | timestamp f64 | start_ts f64 | end_ts f64 | final u8
+#                  | id_len u16 | name_len u16 | text_len u32 | emb_dim u16
+#                  | id | name | text (utf8) | emb f32 * emb_dim
+#
+# low rate events (vision_stats, audio_stats) stay plain dicts
+
+import struct
+from dataclasses import dataclass, field
+from typing import ClassVar
+
+import numpy as np
+
+VERSION = 2  # 2: speech carries start_ts / end_ts
+
+KIND_VISION_RESULT = 1
+KIND_SPEECH = 2
+
+HEADER = struct.Struct("<BB")
+VISION_BODY = struct.Struct("<IdBHH")
+FACE = struct.Struct("<iiiiifHH")
+SPEECH_BODY = struct.Struct("<IdddBHHIH")
+
+F32 = np.dtype("<f4")
+I32 = np.dtype("<i4")
+
+
+@dataclass(slots=True)
+class Face:
+    track_id: int
+    bbox: tuple  # (x1, y1, x2, y2) full resolution pixels
+    name: str
+    score: float
+    emb: np.ndarray | None = None  # only when embeddings were requested
+
+
+@dataclass(slots=True)
+class VisionResult:
+    type: ClassVar[str] = "vision_result"
+
+    session: int
+    timestamp: float  # frame capture time
+    faces: list = field(default_factory=list)  # every track on keyframes, else changed ones
+    removed: list = field(default_factory=list)  # track ids gone since the last event
+    keyframe: bool = True
+
+
+@dataclass(slots=True)
+class Speech:
+    type: ClassVar[str] = "speech"
+
+    session: int
+    id: str  # utterance id; interim & final events of one sentence share it
+    text: str
+    timestamp: float
+    final: bool
+    name: str
+    # capture time span of the speech so far (first speech chunk -> end of the last one)
+    start_ts: float = 0.0
+    end_ts: float = 0.0
+    embedding: np.ndarray | None = None  # final events only
+
+
+def _emb_bytes(emb) -> tuple[int, bytes]:
+    if emb is None:
+        return 0, b""
+    emb = np.ascontiguousarray(emb, dtype=F32).reshape(-1)
+    return len(emb), emb.tobytes()
+
+
+def encode(event) -> bytes:
+    if isinstance(event, VisionResult):
+        parts = [
+            HEADER.pack(VERSION, KIND_VISION_RESULT),
+            VISION_BODY.pack(
+                event.session,
+                event.timestamp,
+                event.keyframe,
+                len(event.faces),
+                len(event.removed),
+            ),
+            np.asarray(event.removed, dtype=I32).tobytes(),
+        ]
+        for face in event.faces:
+            name = face.name.encode()
+            dim, emb = _emb_bytes(face.emb)
+            parts.append(FACE.pack(face.track_id, *face.bbox, face.score, len(name), dim))
+            parts.append(name)
+            parts.append(emb)
+        return b"".join(parts)
+
+    if isinstance(event, Speech):
+        utterance_id, name, text = event.id.encode(), event.name.encode(), event.text.encode()
+        dim, emb = _emb_bytes(event.embedding)
+        return b"".join(
+            (
+                HEADER.pack(VERSION, KIND_SPEECH),
+                SPEECH_BODY.pack(
+                    event.session,
+                    event.timestamp,
+                    event.start_ts,
+                    event.end_ts,
+                    event.final,
+                    len(utterance_id),
+                    len(name),
+                    len(text),
+                    dim,
+                ),
+                utterance_id,
+                name,
+                text,
+                emb,
+            )
+        )
+
+    raise TypeError(f"can't encode {type(event).__name__}")
+
+
+def decode(data: bytes):
+    # raises ValueError on a version or kind we don't know
+    version, kind = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"unsupported event version {version}")
+    offset = HEADER.size
+
+    if kind == KIND_VISION_RESULT:
+        session, timestamp, keyframe, n_faces, n_removed = VISION_BODY.unpack_from(data, offset)
+        offset += VISION_BODY.size
+        removed = np.frombuffer(data, I32, n_removed, offset).tolist()
+        offset += n_removed * I32.itemsize
+
+        faces = []
+        for _ in range(n_faces):
+            track_id, x1, y1, x2, y2, score, name_len, dim = FACE.unpack_from(data, offset)
+            offset += FACE.size
+            name = data[offset : offset + name_len].decode()
+            offset += name_len
+            emb = np.frombuffer(data, F32, dim, offset) if dim else None
+            offset += dim * F32.itemsize
+            faces.append(Face(track_id, (x1, y1, x2, y2), name, score, emb))
+        return VisionResult(session, timestamp, faces, removed, bool(keyframe))
+
+    if kind == KIND_SPEECH:
+        (
+            session,
+            timestamp,
+            start_ts,
+            end_ts,
+            final,
+            id_len,
+            name_len,
+            text_len,
+            dim,
+        ) = SPEECH_BODY.unpack_from(data, offset)
+        offset += SPEECH_BODY.size
+        utterance_id = data[offset : offset + id_len].decode()
+        offset += id_len
+        name = data[offset : offset + name_len].decode()
+        offset += name_len
+        text = data[offset : offset + text_len].decode()
+        offset += text_len
+        embedding = np.frombuffer(data, F32, dim, offset) if dim else None
+        return Speech(
+            session, utterance_id, text, timestamp, bool(final), name, start_ts, end_ts, embedding
+        )
+
+    raise ValueError(f"unknown event kind {kind}")
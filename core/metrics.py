@@ -0,0 +1,146 @@
+# per stage instrumentation
+# every process keeps its own Metrics: plain dict counters/gauges + fixed bucket histograms,
+# cheap enough to leave on in the hot path (a perf_counter pair + a bisect per observation)
+# workers push cumulative snapshots to the parent over the status queue every few seconds;
+# since they're cumulative the parent only keeps the latest one per worker
+# the parent renders everything as prometheus text for /metrics
+
+import bisect
+import time
+from contextlib import contextmanager
+
+from core import config
+
+# seconds; ~0.5ms bookkeeping up to multi second asr/model stalls
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+PREFIX = "glasses_"
+
+
+def metric_key(name: str, labels: dict | None = None) -> str:
+    # labels are baked into the key, e.g. queue_depth{queue="audio_0"}
+    if not labels:
+        return name
+    inner = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    return f"{name}{{{inner}}}"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        # prometheus buckets are "<= le", which is exactly bisect_left
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "buckets": self.buckets,
+            "counts": list(self.counts),
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class Metrics:
+    def __init__(self, report_interval=config.METRICS_INTERVAL):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.report_interval = report_interval
+        self._reported_ts = 0.0
+
+    def inc(self, name, n=1, labels=None):
+        key = metric_key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def set(self, name, value, labels=None):
+        self.gauges[metric_key(name, labels)] = value
+
+    def observe(self, name, seconds, labels=None):
+        key = metric_key(name, labels)
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms[key] = Histogram()
+        hist.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, labels=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+
+    def snapshot(self) -> dict:
+        # plain dicts/lists so it pickles cheaply through a queue
+        # list(items()) copies in one go, so another thread adding a key can't break it
+        return {
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "histograms": {k: h.snapshot() for k, h in list(self.histograms.items())},
+        }
+
+    def due(self) -> bool:
+        # True once per report_interval; caller then sends snapshot()
+        now = time.time()
+        if now - self._reported_ts < self.report_interval:
+            return False
+        self._reported_ts = now
+        return True
+
+
+def _with_label(key: str, label: str) -> str:
+    # adds one more label to an already labelled key
+    if "{" not in key:
+        return f"{key}{{{label}}}"
+    return f"{key[:-1]},{label}}}"
+
+
+def _split(key: str):
+    name, brace, rest = key.partition("{")
+    return name, rest[:-1] if brace else ""
+
+
+def render_prometheus(snapshots: dict) -> str:
+    # snapshots: source (worker name / "server") -> Metrics.snapshot()
+    # every sample gets a worker label; sum over it in prometheus for pool totals
+    counters, gauges, histograms = {}, {}, {}
+    for source, snap in snapshots.items():
+        worker = f'worker="{source}"'
+        for kind, out in (("counters", counters), ("gauges", gauges)):
+            for key, value in snap[kind].items():
+                name, _ = _split(key)
+                out.setdefault(name, []).append((_with_label(key, worker), value))
+        for key, hist in snap["histograms"].items():
+            name, labels = _split(key)
+            labels = f"{labels},{worker}" if labels else worker
+            histograms.setdefault(name, []).append((labels, hist))
+
+    lines = []
+    for kind, samples in (("counter", counters), ("gauge", gauges)):
+        for name in sorted(samples):
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+            for key, value in samples[name]:
+                lines.append(f"{PREFIX}{key} {value}")
+
+    for name in sorted(histograms):
+        lines.append(f"# TYPE {PREFIX}{name} histogram")
+        for labels, hist in histograms[name]:
+            cumulative = 0
+            for le, count in zip([*hist["buckets"], "+Inf"], hist["counts"]):
+                cumulative += count
+                lines.append(f'{PREFIX}{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{PREFIX}{name}_sum{{{labels}}} {hist['sum']}")
+            lines.append(f"{PREFIX}{name}_count{{{labels}}} {hist['count']}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,90 @@
+# wire format for /stream messages
+#
+# v1 (legacy): 1 header byte (config.HEADER_VISION / HEADER_AUDIO) + raw payload
+# v2: fixed 20 byte little endian header + raw payload
+#     magic u8 | version u8 | stream u8 | codec u8 | session u32 | seq u32 | capture time f64
+#
+# the server accepts both on any connection; the first byte tells them apart since the
+# magic never collides with a legacy header byte. clients pick which one they speak
+
+import struct
+from typing import NamedTuple
+
+from core import config
+
+MAGIC = 0xA7
+VERSION = 2
+LEGACY_VERSION = 1
+
+STREAM_VISION = 1
+STREAM_AUDIO = 2
+
+CODEC_UNKNOWN = 0
+CODEC_JPEG = 1
+CODEC_PCM16 = 2  # mono 16 bit little endian at config.SAMPLE_RATE
+
+HEADER = struct.Struct("<BBBBIId")
+
+_LEGACY_STREAMS = {
+    config.HEADER_VISION[0]: (STREAM_VISION, CODEC_JPEG),
+    config.HEADER_AUDIO[0]: (STREAM_AUDIO, CODEC_PCM16),
+}
+
+
+class FrameHeader(NamedTuple):
+    version: int
+    stream: int
+    codec: int
+    session: int  # client side id; the server keys state on its own per-connection session
+    seq: int | None  # None for legacy messages
+    capture_ts: float | None  # unix seconds on the glasses; None for legacy messages
+
+
+class ClockOffset:
+    # maps one connection's capture timestamps onto the server clock; the glasses' clock can
+    # be seconds off, which would make every frame look stale (behind) or never stale (ahead)
+    # offset is the running minimum of arrival - capture, i.e. the clock skew plus the fastest
+    # network hop seen so far, so a normalized timestamp is never in the server's future
+    def __init__(self):
+        self.offset = None
+
+    def normalize(self, capture_ts: float, arrival_ts: float) -> float:
+        sample = arrival_ts - capture_ts
+        if self.offset is None or sample < self.offset:
+            self.offset = sample
+        return capture_ts + self.offset
+
+
+def pack(stream, codec, session, seq, capture_ts, payload) -> bytes:
+    return HEADER.pack(MAGIC, VERSION, stream, codec, session, seq, capture_ts) + payload
+
+
+def pack_legacy(stream, payload) -> bytes:
+    header = config.HEADER_VISION if stream == STREAM_VISION else config.HEADER_AUDIO
+    return header + payload
+
+
+def parse(data: bytes):
+    # returns (FrameHeader, payload memoryview); the view shares data's buffer so the
+    # payload never gets copied just to strip the header
+    # raises ValueError on anything we don't understand
+    if not data:
+        raise ValueError("empty message")
+
+    view = memoryview(data)
+    first = data[0]
+    if first == MAGIC:
+        if len(data) < HEADER.size:
+            raise ValueError("truncated header")
+        _, version, stream, codec, session, seq, capture_ts = HEADER.unpack_from(data)
+        if version != VERSION:
+            raise ValueError(f"unsupported protocol version {version}")
+        return FrameHeader(version, stream, codec, session, seq, capture_ts), view[
+            HEADER.size :
+        ]
+
+    if first in _LEGACY_STREAMS:
+        stream, codec = _LEGACY_STREAMS[first]
+        return FrameHeader(LEGACY_VERSION, stream, codec, 0, None, None), view[1:]
+
+    raise ValueError(f"unknown header byte {first:#x}")
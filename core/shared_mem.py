@@ -1,21 +1,445 @@
+import asyncio
+import itertools
 import multiprocessing as mp
+import queue
+import time
+from multiprocessing import queues, shared_memory
+
+import numpy as np
+
+from core import config
+from core.metrics import Metrics, metric_key, render_prometheus
+
+# header in front of every slot; seq 0 means empty or mid-write
+SLOT_HEADER = np.dtype(
+    [("seq", "<u8"), ("length", "<u4"), ("session", "<u4"), ("ts", "<f8")]
+)
+CONTROL_BYTES = 64  # head & read counters live here; padded to a cache line
+
+# overflow policies for ingest
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+WAIT = "wait"
+
+
+class FrameRing:
+    # fixed slot ring buffer in shared memory so jpeg bytes don't get pickled through a pipe
+    # one writer (the /stream route) and one reader (vision worker)
+    # writer never blocks; if the reader falls behind the oldest slots get overwritten
+    # control channel is the head counter in shared mem + a condition to wake the reader
+
+    def __init__(
+        self, slots=config.FRAME_RING_SLOTS, slot_bytes=config.FRAME_RING_SLOT_BYTES
+    ):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        size = CONTROL_BYTES + slots * (SLOT_HEADER.itemsize + slot_bytes)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._owner = True
+        self._cond = mp.Condition()
+        self._attach()
+        self._head[0] = 0
+        self._read[0] = 0
+        self._headers["seq"] = 0
+
+    def __getstate__(self):
+        # only the name crosses the process boundary; child attaches to the same block
+        return {
+            "name": self._shm.name,
+            "slots": self.slots,
+            "slot_bytes": self.slot_bytes,
+            "cond": self._cond,
+        }
+
+    def __setstate__(self, state):
+        self.slots = state["slots"]
+        self.slot_bytes = state["slot_bytes"]
+        self._cond = state["cond"]
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+        self._attach()
+
+    def _attach(self):
+        buf = self._shm.buf
+        self._head = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=0)
+        # last seq the reader took; only there so other processes can see the depth
+        self._read = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=8)
+        self._headers = np.ndarray(
+            (self.slots,), dtype=SLOT_HEADER, buffer=buf, offset=CONTROL_BYTES
+        )
+        self._data = np.ndarray(
+            (self.slots, self.slot_bytes),
+            dtype=np.uint8,
+            buffer=buf,
+            offset=CONTROL_BYTES + self.slots * SLOT_HEADER.itemsize,
+        )
+        # per process stats; writer counts oversized, reader counts overwritten
+        self._next_seq = 1
+        self.oversized = 0
+        self.overwritten = 0
+
+    def put(self, payload, session=0, ts=None) -> bool:
+        # copy payload into the next slot; returns False if it can't fit
+        n = len(payload)
+        if n > self.slot_bytes:
+            self.oversized += 1
+            return False
+
+        with self._cond:
+            seq = int(self._head[0]) + 1
+            slot = seq % self.slots
+            self._headers["seq"][slot] = 0  # mark mid-write so reader drops it if it's looking
+            self._data[slot, :n] = np.frombuffer(payload, dtype=np.uint8)
+            self._headers["length"][slot] = n
+            self._headers["session"][slot] = session
+            self._headers["ts"][slot] = time.time() if ts is None else ts
+            self._headers["seq"][slot] = seq
+            self._head[0] = seq
+            self._cond.notify()
+        return True
+
+    def get(self, timeout=None):
+        # returns (seq, session, ts, view); view points into shared mem so it's only good
+        # while is_current(seq) holds; raises queue.Empty like mp.Queue
+        while True:
+            with self._cond:
+                if not self._cond.wait_for(
+                    lambda: int(self._head[0]) >= self._next_seq, timeout
+                ):
+                    raise queue.Empty
+                head = int(self._head[0])
+
+            oldest = head - self.slots + 1
+            if self._next_seq < oldest:  # lapped by the writer
+                self.overwritten += oldest - self._next_seq
+                self._next_seq = oldest
+
+            seq = self._next_seq
+            self._next_seq += 1
+            self._read[0] = seq
+            slot = seq % self.slots
+            if int(self._headers["seq"][slot]) != seq:  # overwritten since we looked
+                self.overwritten += 1
+                continue
+
+            length = int(self._headers["length"][slot])
+            session = int(self._headers["session"][slot])
+            ts = float(self._headers["ts"][slot])
+            return seq, session, ts, self._data[slot, :length]
+
+    def get_latest(self, timeout=None):
+        # latest-frame-wins read for a ring shared by several sessions: jumps to the head and
+        # returns the newest pending frame of every session, oldest first, without touching
+        # the payloads; only the slot headers (which carry the session) get scanned
+        # returns ([(seq, session, ts, view), ...], frames skipped for a newer one)
+        with self._cond:
+            if not self._cond.wait_for(lambda: int(self._head[0]) >= self._next_seq, timeout):
+                raise queue.Empty
+            head = int(self._head[0])
+
+        oldest = head - self.slots + 1
+        if self._next_seq < oldest:  # lapped by the writer
+            self.overwritten += oldest - self._next_seq
+            self._next_seq = oldest
+
+        newest = {}  # session -> (seq, ts, length)
+        valid = 0
+        for seq in range(self._next_seq, head + 1):
+            slot = seq % self.slots
+            session = int(self._headers["session"][slot])
+            ts = float(self._headers["ts"][slot])
+            length = int(self._headers["length"][slot])
+            # seq checked after the other fields so they can't be from a newer frame
+            if int(self._headers["seq"][slot]) != seq:
+                self.overwritten += 1
+                continue
+            valid += 1
+            newest[session] = (seq, ts, length)
+
+        self._next_seq = head + 1
+        self._read[0] = head
+        frames = sorted(
+            (seq, session, ts, self._data[seq % self.slots, :length])
+            for session, (seq, ts, length) in newest.items()
+        )
+        return frames, valid - len(frames)
+
+    def qsize(self) -> int:
+        # frames written but not yet taken; capped at slots since older ones are gone anyway
+        return min(int(self._head[0]) - int(self._read[0]), self.slots)
+
+    def is_current(self, seq) -> bool:
+        # check after using a view; False means the writer reused the slot underneath us
+        return int(self._headers["seq"][seq % self.slots]) == seq
+
+    def close(self):
+        # numpy views hold exported pointers into the buffer; drop them before closing
+        self._head = self._read = self._headers = self._data = None
+        try:
+            self._shm.close()
+        except BufferError:
+            print("[Shared Mem] Frame ring still referenced; leaving mapping open")
+        if self._owner:
+            self._shm.unlink()
+
+
+class CountedQueue(queues.Queue):
+    # mp.Queue that also counts puts & gets in shared memory, so any process can read the
+    # depth; mp.Queue.qsize() raises NotImplementedError on macOS (no sem_getvalue)
+
+    def __init__(self, maxsize=0):
+        super().__init__(maxsize, ctx=mp.get_context())
+        self._puts = mp.Value("Q", 0)
+        self._gets = mp.Value("Q", 0)
+
+    def __getstate__(self):
+        return super().__getstate__(), self._puts, self._gets
+
+    def __setstate__(self, state):
+        state, self._puts, self._gets = state
+        super().__setstate__(state)
+
+    # put_nowait / get_nowait go through these too
+    def put(self, obj, block=True, timeout=None):
+        super().put(obj, block, timeout)
+        with self._puts.get_lock():
+            self._puts.value += 1
+
+    def get(self, block=True, timeout=None):
+        item = super().get(block, timeout)
+        with self._gets.get_lock():
+            self._gets.value += 1
+        return item
+
+    def qsize(self) -> int:
+        return max(self._puts.value - self._gets.value, 0)
 
 
 class SharedMem:
     def __init__(self):
-        self.vision_queue = mp.Queue(maxsize=100)
-        self.audio_queue = mp.Queue(maxsize=100)
+        # one input per worker; a websocket session sticks to one vision & one audio worker
+        # so per-stream tracker/transcriber state never gets split across processes
+        # vision frames go through shared mem by default; mp.Queue kept as fallback
+        if config.VISION_TRANSPORT == "shm":
+            self.vision_queues = [FrameRing() for _ in range(config.VISION_WORKERS)]
+        else:
+            self.vision_queues = [
+                CountedQueue(maxsize=100) for _ in range(config.VISION_WORKERS)
+            ]
+        self.audio_queues = [CountedQueue(maxsize=100) for _ in range(config.AUDIO_WORKERS)]
+
+        # counted so /metrics has a depth for every queue on every platform
+        self.results_queue = CountedQueue()
+        self.vision_command_queues = [CountedQueue() for _ in range(config.VISION_WORKERS)]
+        self.audio_command_queues = [CountedQueue() for _ in range(config.AUDIO_WORKERS)]
+        self.status_queue = CountedQueue()  # startup timings / readiness / metrics from every worker
+
+        # worker name -> ready event / process; filled in by register_workers
+        self.ready_events = {}
+        self.workers = {}
+        self.startup_phases = {}
+
+        # overflow handling for the route; counters only live in the server process
+        self.policies = {
+            "vision": config.VISION_QUEUE_POLICY,
+            "audio": config.AUDIO_QUEUE_POLICY,
+        }
+        self.drop_counts = {"vision": 0, "audio": 0}
+
+        # server side metrics + the latest snapshot each worker pushed; rendered for /metrics
+        self.metrics = Metrics()
+        self.worker_metrics = {}
+
+        # session id -> {"vision": worker idx, "audio": worker idx}
+        self.sessions = {}
+        self._session_ids = itertools.count(1)
+        self._load = {
+            "vision": [0] * len(self.vision_queues),
+            "audio": [0] * len(self.audio_queues),
+        }
+
+    def register_workers(self, workers):
+        for w in workers:
+            self.ready_events[w.name] = w.ready
+            self.workers[w.name] = w
+            self.startup_phases.setdefault(w.name, {})
+
+    def is_ready(self) -> bool:
+        return all(e.is_set() for e in self.ready_events.values()) and not self.failed_workers()
+
+    def failed_workers(self) -> dict:
+        # worker name -> exit code for every worker process that has exited (crashed in setup,
+        # bad model path, ...); they never come back, so waiting on them is pointless
+        return {
+            name: w.exitcode for name, w in self.workers.items() if w.exitcode is not None
+        }
+
+    def drain_status(self):
+        # startup timings & metrics snapshots both come up the status queue; main keeps
+        # calling this in the background so it never backs up when nobody scrapes /metrics
+        while True:
+            try:
+                status = self.status_queue.get_nowait()
+            except queue.Empty:
+                break
+            if status["type"] == "startup_phase":
+                phases = self.startup_phases.setdefault(status["worker"], {})
+                phases[status["phase"]] = round(status["seconds"], 3)
+            elif status["type"] == "metrics":
+                self.worker_metrics[status["worker"]] = status["metrics"]
+
+    def readiness(self) -> dict:
+        # per worker ready flag, liveness + how long each startup phase took
+        self.drain_status()
+        failed = self.failed_workers()
+        return {
+            "ready": self.is_ready(),
+            "failed": sorted(failed),
+            "workers": {
+                name: {
+                    "ready": event.is_set(),
+                    "alive": self.workers[name].is_alive(),
+                    "exitcode": failed.get(name),
+                    "phases": self.startup_phases[name],
+                }
+                for name, event in self.ready_events.items()
+            },
+        }
 
-        self.results_queue = mp.Queue()
-        self.vision_command_queue = mp.Queue()
+    def named_queues(self) -> dict:
+        named = {"results": self.results_queue, "status": self.status_queue}
+        for stream in ("vision", "audio"):
+            inputs = self.vision_queues if stream == "vision" else self.audio_queues
+            commands = (
+                self.vision_command_queues if stream == "vision" else self.audio_command_queues
+            )
+            for i, (q, cq) in enumerate(zip(inputs, commands)):
+                named[f"{stream}_{i}"] = q
+                named[f"{stream}_command_{i}"] = cq
+        return named
+
+    def render_metrics(self) -> str:
+        # prometheus text: every worker's latest snapshot + server side counters & queue depths
+        self.drain_status()
+        for name, q in self.named_queues().items():
+            self.metrics.set("queue_depth", q.qsize(), {"queue": name})
+        for stream, count in self.drop_counts.items():
+            key = metric_key("ingest_dropped_total", {"stream": stream})
+            self.metrics.counters[key] = count
+        self.metrics.set("sessions_open", len(self.sessions))
+        return render_prometheus({"server": self.metrics.snapshot(), **self.worker_metrics})
+
+    async def wait_ready(self, timeout=None) -> bool:
+        # polls instead of blocking on the events so the event loop keeps serving
+        # gives up right away once a worker has died; it'd never become ready
+        deadline = None if timeout is None else time.time() + timeout
+        while not self.is_ready():
+            if self.failed_workers():
+                return False
+            if deadline is not None and time.time() > deadline:
+                return False
+            await asyncio.sleep(0.1)
+        return True
+
+    def open_session(self) -> int:
+        # dispatcher: pin the new session to the least loaded worker of each pool
+        session = next(self._session_ids)
+        assignment = {}
+        for stream, load in self._load.items():
+            idx = min(range(len(load)), key=load.__getitem__)
+            load[idx] += 1
+            assignment[stream] = idx
+        self.sessions[session] = assignment
+        return session
+
+    def close_session(self, session: int):
+        # tell the pinned workers to flush & free the session's state
+        assignment = self.sessions.pop(session, None)
+        if assignment is None:
+            return
+        for stream, idx in assignment.items():
+            self._load[stream][idx] -= 1
+        command = {"type": "close_session", "session": session}
+        self.vision_command_queues[assignment["vision"]].put(command)
+        self.audio_command_queues[assignment["audio"]].put(command)
+
+    def request_embeddings(self, enabled: bool):
+        # face embeddings are left out of vision results unless someone asks for them
+        for q in self.vision_command_queues:
+            q.put({"type": "send_embeddings", "enabled": enabled})
+
+    async def ingest(self, session: int, stream: str, payload, ts=None) -> bool:
+        # called from the websocket handler; must never block the event loop
+        # payload can be a memoryview into the websocket message; ts is capture time
+        # (arrival time if the client didn't send one)
+        # returns False if the payload was dropped
+        idx = self.sessions[session][stream]
+        q = self.vision_queues[idx] if stream == "vision" else self.audio_queues[idx]
+        ts = time.time() if ts is None else ts
+        self.metrics.inc("ingest_messages_total", labels={"stream": stream})
+
+        if isinstance(q, FrameRing):  # ring overwrites oldest on its own; copies the view once
+            if q.put(payload, session=session, ts=ts):
+                return True
+            self.drop_counts[stream] += 1
+            return False
+
+        # queues pickle their items, which needs real bytes
+        payload = (session, ts, bytes(payload))
+
+        try:
+            q.put_nowait(payload)
+            return True
+        except queue.Full:
+            pass
+
+        policy = self.policies[stream]
+        if policy == DROP_OLDEST:
+            try:
+                q.get_nowait()
+                self.drop_counts[stream] += 1
+            except queue.Empty:
+                pass
+            try:
+                q.put_nowait(payload)
+                return True
+            except queue.Full:  # worker side raced us; lose the new one instead
+                self.drop_counts[stream] += 1
+                return False
+
+        if policy == BLOCK:
+            # the time this stalls the connection is the backpressure the client sees
+            with self.metrics.timer("ingest_block_seconds", {"stream": stream}):
+                await asyncio.to_thread(q.put, payload)
+            return True
+
+        # WAIT
+        try:
+            await asyncio.to_thread(q.put, payload, True, config.QUEUE_WAIT_TIMEOUT)
+            return True
+        except queue.Full:
+            self.drop_counts[stream] += 1
+            return False
 
     def shutdown(self):
-        self.vision_queue.cancel_join_thread() 
-        self.audio_queue.cancel_join_thread() 
-        self.results_queue.cancel_join_thread() 
-        self.vision_command_queue.cancel_join_thread() 
-        self.vision_queue.close() 
-        self.audio_queue.close() 
-        self.results_queue.close() 
-        self.vision_command_queue.close() 
+        queues = [
+            *self.audio_queues,
+            self.results_queue,
+            *self.vision_command_queues,
+            *self.audio_command_queues,
+            self.status_queue,
+        ]
+        for q in self.vision_queues:
+            if isinstance(q, FrameRing):
+                q.close()
+            else:
+                queues.append(q)
+
+        for q in queues:
+            q.cancel_join_thread()
+        for q in queues:
+            q.close()
         print("[Shared Mem] Queues closed")
+        print(
+            f"[Shared Mem] Dropped at ingest: vision={self.drop_counts['vision']} audio={self.drop_counts['audio']}"
+        )
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from core import events
+from core.events import Face, Speech, VisionResult
+
+
+def test_vision_result_round_trip():
+    emb = np.arange(4, dtype=np.float32)
+    event = VisionResult(
+        session=3,
+        timestamp=1700000000.5,
+        faces=[
+            Face(1, (10, 20, 110, 140), "Matt", 0.875, emb),
+            Face(2, (0, 0, 5, 5), "Unknown", 0.0),
+        ],
+        removed=[7, 9],
+        keyframe=False,
+    )
+    decoded = events.decode(events.encode(event))
+
+    assert (decoded.session, decoded.timestamp, decoded.keyframe) == (3, 1700000000.5, False)
+    assert decoded.removed == [7, 9]
+    assert [(f.track_id, f.bbox, f.name) for f in decoded.faces] == [
+        (1, (10, 20, 110, 140), "Matt"),
+        (2, (0, 0, 5, 5), "Unknown"),
+    ]
+    assert decoded.faces[0].score == pytest.approx(0.875)
+    np.testing.assert_array_equal(decoded.faces[0].emb, emb)
+    assert decoded.faces[1].emb is None
+
+
+def test_empty_keyframe_round_trip():
+    decoded = events.decode(events.encode(VisionResult(1, 2.0)))
+    assert decoded == VisionResult(1, 2.0, [], [], True)
+
+
+def test_speech_round_trip_with_unicode():
+    event = Speech(
+        session=5,
+        id="utt-1",
+        text="héllo wörld ✓",
+        timestamp=12.5,
+        final=True,
+        name="Shaun",
+        start_ts=10.0,
+        end_ts=12.25,
+        embedding=np.ones(192, dtype=np.float32),
+    )
+    decoded = events.decode(events.encode(event))
+
+    assert decoded.embedding.dtype == np.float32
+    np.testing.assert_array_equal(decoded.embedding, event.embedding)
+    decoded.embedding = event.embedding = None
+    assert decoded == event
+
+
+def test_interim_speech_has_no_embedding():
+    event = Speech(1, "u", "so far", 1.0, False, "Unknown", 0.5, 1.0)
+    assert events.decode(events.encode(event)) == event
+
+
+def test_decoded_embedding_is_read_only_view():
+    data = events.encode(Speech(1, "u", "", 0.0, True, "x", embedding=np.zeros(3, np.float32)))
+    emb = events.decode(data).embedding
+    assert not emb.flags.writeable
+
+
+def test_unknown_version_and_kind_raise():
+    data = bytearray(events.encode(VisionResult(1, 0.0)))
+    data[0] = events.VERSION + 1
+    with pytest.raises(ValueError):
+        events.decode(bytes(data))
+
+    data[0], data[1] = events.VERSION, 99
+    with pytest.raises(ValueError):
+        events.decode(bytes(data))
+
+
+def test_encode_rejects_other_types():
+    with pytest.raises(TypeError):
+        events.encode({"type": "vision_stats"})
@@ -0,0 +1,74 @@
+import pytest
+
+from core import config, protocol
+
+
+def test_v2_round_trip():
+    data = protocol.pack(
+        protocol.STREAM_VISION, protocol.CODEC_JPEG, 7, 42, 1700000000.25, b"jpeg"
+    )
+    header, payload = protocol.parse(data)
+    assert header == protocol.FrameHeader(
+        protocol.VERSION, protocol.STREAM_VISION, protocol.CODEC_JPEG, 7, 42, 1700000000.25
+    )
+    assert bytes(payload) == b"jpeg"
+
+
+def test_payload_is_a_view_not_a_copy():
+    data = bytearray(protocol.pack(protocol.STREAM_AUDIO, protocol.CODEC_PCM16, 1, 1, 0.0, b"pcm"))
+    _, payload = protocol.parse(data)
+    data[-1] = ord("x")
+    assert bytes(payload) == b"pcx"
+
+
+@pytest.mark.parametrize(
+    "header_byte, stream, codec",
+    [
+        (config.HEADER_VISION, protocol.STREAM_VISION, protocol.CODEC_JPEG),
+        (config.HEADER_AUDIO, protocol.STREAM_AUDIO, protocol.CODEC_PCM16),
+    ],
+)
+def test_legacy_messages_still_parse(header_byte, stream, codec):
+    header, payload = protocol.parse(header_byte + b"raw")
+    assert header.version == protocol.LEGACY_VERSION
+    assert (header.stream, header.codec) == (stream, codec)
+    assert header.seq is None and header.capture_ts is None
+    assert bytes(payload) == b"raw"
+
+
+def test_pack_legacy_matches_parse():
+    header, payload = protocol.parse(protocol.pack_legacy(protocol.STREAM_AUDIO, b"pcm"))
+    assert header.stream == protocol.STREAM_AUDIO and bytes(payload) == b"pcm"
+
+
+def test_magic_never_collides_with_legacy_headers():
+    assert protocol.MAGIC not in (config.HEADER_VISION[0], config.HEADER_AUDIO[0])
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"\xff payload",
+        bytes([protocol.MAGIC, protocol.VERSION, 1]),  # truncated header
+        protocol.HEADER.pack(protocol.MAGIC, 9, 1, 1, 0, 0, 0.0),  # unknown version
+    ],
+)
+def test_bad_messages_raise_value_error(data):
+    with pytest.raises(ValueError):
+        protocol.parse(data)
+
+
+def test_clock_offset_maps_skewed_clock_onto_server_clock():
+    clock = protocol.ClockOffset()
+    # glasses 5s behind the server; network hop between 20ms and 80ms
+    for capture, hop in [(100.0, 0.08), (100.1, 0.02), (100.2, 0.05)]:
+        normalized = clock.normalize(capture, capture + 5.0 + hop)
+    assert clock.offset == pytest.approx(5.02)
+    assert normalized == pytest.approx(100.2 + 5.02)
+
+
+def test_clock_offset_never_puts_capture_in_the_future():
+    clock = protocol.ClockOffset()
+    for capture, arrival in [(50.0, 10.0), (50.5, 10.3), (51.0, 11.2)]:  # glasses ahead
+        assert clock.normalize(capture, arrival) <= arrival
@@ -0,0 +1,160 @@
+import asyncio
+import queue
+import time
+
+import numpy as np
+import pytest
+
+from core import config
+from core.shared_mem import BLOCK, DROP_OLDEST, WAIT, CountedQueue, FrameRing, SharedMem
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing(slots=4, slot_bytes=16)
+    yield ring
+    ring.close()
+
+
+def test_put_get_in_order(ring):
+    ring.put(b"one", session=1, ts=10.0)
+    ring.put(b"two", session=2, ts=11.0)
+
+    seq, session, ts, view = ring.get(timeout=0)
+    assert (seq, session, ts, bytes(view)) == (1, 1, 10.0, b"one")
+    seq, session, ts, view = ring.get(timeout=0)
+    assert (seq, session, ts, bytes(view)) == (2, 2, 11.0, b"two")
+    with pytest.raises(queue.Empty):
+        ring.get(timeout=0)
+
+
+def test_oversized_payload_is_refused(ring):
+    assert not ring.put(b"x" * 17)
+    assert ring.oversized == 1
+    assert ring.qsize() == 0
+
+
+def test_lapped_reader_skips_to_oldest_slot(ring):
+    for i in range(1, 7):  # 6 frames into 4 slots; 1 & 2 are gone
+        ring.put(bytes([i]))
+
+    seq, _, _, view = ring.get(timeout=0)
+    assert seq == 3 and bytes(view) == b"\x03"
+    assert ring.overwritten == 2
+
+
+def test_view_is_torn_once_slot_is_reused(ring):
+    ring.put(b"old")
+    seq, _, _, view = ring.get(timeout=0)
+    assert ring.is_current(seq)
+
+    for _ in range(ring.slots):  # writer comes all the way around
+        ring.put(b"new")
+    assert not ring.is_current(seq)
+    assert bytes(view) == b"new"  # the view now shows someone else's bytes
+
+
+def test_slot_mid_write_is_skipped(ring):
+    ring.put(b"a")
+    ring.put(b"b")
+    ring._headers["seq"][1 % ring.slots] = 0  # writer marked slot 1 mid-write
+
+    seq, _, _, view = ring.get(timeout=0)
+    assert seq == 2 and bytes(view) == b"b"
+    assert ring.overwritten == 1
+
+
+def test_qsize_tracks_reads_and_caps_at_slots(ring):
+    for _ in range(10):
+        ring.put(np.zeros(4, np.uint8))
+    assert ring.qsize() == ring.slots
+    ring.get(timeout=0)
+    assert ring.qsize() == ring.slots - 1
+
+
+def test_get_latest_keeps_newest_frame_per_session(ring):
+    ring.put(b"a1", session=1)
+    ring.put(b"b1", session=2)
+    ring.put(b"a2", session=1)
+
+    frames, skipped = ring.get_latest(timeout=0)
+    assert [(seq, session, bytes(view)) for seq, session, _, view in frames] == [
+        (2, 2, b"b1"),
+        (3, 1, b"a2"),
+    ]
+    assert skipped == 1
+    assert ring.qsize() == 0
+    with pytest.raises(queue.Empty):
+        ring.get_latest(timeout=0)
+
+
+def test_get_latest_after_lap_only_sees_live_slots(ring):
+    for i in range(1, 7):
+        ring.put(bytes([i]), session=1)
+
+    frames, skipped = ring.get_latest(timeout=0)
+    assert [(seq, bytes(view)) for seq, _, _, view in frames] == [(6, b"\x06")]
+    assert skipped == 3  # 3, 4 & 5; 1 & 2 were overwritten before we looked
+    assert ring.overwritten == 2
+
+
+@pytest.fixture
+def shm(monkeypatch):
+    # audio always goes through a queue; swap in a tiny one so it fills after two chunks
+    monkeypatch.setattr(config, "VISION_TRANSPORT", "queue")
+    monkeypatch.setattr(config, "VISION_WORKERS", 1)
+    monkeypatch.setattr(config, "AUDIO_WORKERS", 1)
+    shm = SharedMem()
+    shm.audio_queues[0].close()
+    shm.audio_queues[0] = CountedQueue(maxsize=2)
+    yield shm
+    shm.shutdown()
+
+
+def fill(shm, policy) -> int:
+    shm.policies["audio"] = policy
+    session = shm.open_session()
+    assert asyncio.run(shm.ingest(session, "audio", b"1", ts=1.0))
+    assert asyncio.run(shm.ingest(session, "audio", b"2", ts=2.0))
+    time.sleep(0.1)  # let the feeder thread flush so get_nowait can see the items
+    return session
+
+
+def drain(q):
+    return [q.get(timeout=1)[2] for _ in range(q.qsize())]
+
+
+def test_ingest_drop_oldest_evicts_the_stalest_item(shm):
+    q = shm.audio_queues[0]
+    session = fill(shm, DROP_OLDEST)
+
+    assert asyncio.run(shm.ingest(session, "audio", memoryview(b"3"), ts=3.0))
+    assert shm.drop_counts == {"vision": 0, "audio": 1}
+    assert drain(q) == [b"2", b"3"]
+
+
+def test_ingest_block_waits_for_room_and_never_drops(shm):
+    q = shm.audio_queues[0]
+    session = fill(shm, BLOCK)
+
+    async def go():
+        task = asyncio.create_task(shm.ingest(session, "audio", b"3", ts=3.0))
+        await asyncio.sleep(0.1)
+        assert not task.done()  # stuck behind the full queue
+        assert q.get(timeout=1)[2] == b"1"  # worker catches up
+        return await asyncio.wait_for(task, 1)
+
+    assert asyncio.run(go())
+    assert shm.drop_counts["audio"] == 0
+    assert drain(q) == [b"2", b"3"]
+
+
+def test_ingest_wait_drops_the_new_item_after_timeout(shm, monkeypatch):
+    monkeypatch.setattr(config, "QUEUE_WAIT_TIMEOUT", 0.05)
+    q = shm.audio_queues[0]
+    session = fill(shm, WAIT)
+
+    assert not asyncio.run(shm.ingest(session, "audio", b"3", ts=3.0))
+    assert not asyncio.run(shm.ingest(session, "audio", b"4", ts=4.0))
+    assert shm.drop_counts == {"vision": 0, "audio": 2}
+    assert drain(q) == [b"1", b"2"]
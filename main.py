@@ -1,3 +1,5 @@
+import asyncio
+import time
 from contextlib import asynccontextmanager
 
 import uvicorn
@@ -14,26 +16,40 @@ from workers.vision import VisionWorker
 # defines lifespan; handles startup and shutdown events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    shared_mem = SharedMem()  # shared mem is 3 queues; again can look into shared_mem or direct pipies if this too slow
+    shared_mem = SharedMem()  # frame ring in shared mem for vision + queues for audio, results & commands
 
     app.state.system = shared_mem
 
-    brain = Coordinator(shared_mem.results_queue)
-    audio_worker = AudioWorker(shared_mem.audio_queue, shared_mem.results_queue)
-    vision_worker = VisionWorker(
-        shared_mem.vision_queue,
-        shared_mem.results_queue,
-        shared_mem.vision_command_queue,
-    )
-
-    brain.start()
-    audio_worker.start()
-    vision_worker.start()
+    brain = Coordinator(shared_mem.results_queue, shared_mem.status_queue)
+    # one worker per input queue; the dispatcher in SharedMem pins sessions to workers
+    audio_workers = [
+        AudioWorker(q, shared_mem.results_queue, command_queue, shared_mem.status_queue)
+        for q, command_queue in zip(
+            shared_mem.audio_queues, shared_mem.audio_command_queues
+        )
+    ]
+    vision_workers = [
+        VisionWorker(q, shared_mem.results_queue, command_queue, shared_mem.status_queue)
+        for q, command_queue in zip(
+            shared_mem.vision_queues, shared_mem.vision_command_queues
+        )
+    ]
+
+    # workers load their models in parallel (own processes); server comes up right away and
+    # /ready + the stream route hold traffic until they're warm
+    workers = [*audio_workers, *vision_workers, brain]
+    shared_mem.register_workers(workers)
+    startup_ts = time.perf_counter()
+    for w in workers:
+        w.start()
+    startup_task = asyncio.create_task(log_startup(shared_mem, startup_ts))
+    status_task = asyncio.create_task(drain_status(shared_mem))
 
     yield  # app running after this
 
+    startup_task.cancel()
+    status_task.cancel()
     print("[System] Shutting down workers")
-    workers = [audio_worker, vision_worker, brain]
     for w in workers:
         w.shutdown()
 
@@ -52,6 +68,25 @@ async def lifespan(app: FastAPI):
     print("[System] All workers stopped")
 
 
+async def log_startup(shared_mem, startup_ts):
+    if not await shared_mem.wait_ready():
+        for name, exitcode in shared_mem.failed_workers().items():
+            print(f"[System] {name} exited during startup (exit code {exitcode})")
+        return
+    print(f"[System] All workers ready in {time.perf_counter() - startup_ts:.2f}s")
+    for name, status in shared_mem.readiness()["workers"].items():
+        phases = ", ".join(f"{phase} {sec:.2f}s" for phase, sec in status["phases"].items())
+        print(f"[System]   {name}: {phases or 'no phases'}")
+
+
+async def drain_status(shared_mem):
+    # workers push metrics snapshots every METRICS_INTERVAL whether or not anyone scrapes
+    # /metrics; keep the status queue empty so its feeder buffers don't grow forever
+    while True:
+        shared_mem.drain_status()
+        await asyncio.sleep(0.5)
+
+
 def start_server():
     app = FastAPI(lifespan=lifespan)
 
@@ -1,179 +1,509 @@
-import json
 import queue
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 import mlx.core as mx
 import numpy as np
 import onnxruntime as ort
 from parakeet_mlx import from_pretrained
 
-from core import config
+from core import config, events
+from core.events import Speech
+from workers.audio_utils.audio_buffers import PcmRing, UtteranceBuffer
+from workers.audio_utils.speaker_bank import load_speaker_bank
+from workers.audio_utils.speaker_index import SpeakerIndex
+from workers.audio_utils.vad import make_vad
 from workers.base import IngestionWorker
 
 
 class AudioWorker(IngestionWorker):
-    def setup(self):
-        # so it doesn't read the config every single loop
-        self.session = ort.InferenceSession("workers/audio_utils/redimnet_b2.onnx")
+    def __init__(self, input_queue, output_queue, command_queue, status_queue=None):
+        super().__init__(input_queue, output_queue, status_queue)
+        self.command_queue = command_queue
 
+    def _load_redimnet(self):
+        with self.startup_phase("redimnet load"):
+            return ort.InferenceSession("workers/audio_utils/redimnet_b2.onnx")
+
+    def _load_parakeet(self):
         print(f"[AudioWorker] Loading model: {config.PARAKEET_MODEL}")
-        self.model = from_pretrained(config.PARAKEET_MODEL)
+        with self.startup_phase("parakeet load"):
+            return from_pretrained(config.PARAKEET_MODEL)
+
+    def setup(self):
+        # both models load at the same time; they're independent & mostly io/native code
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            session_future = pool.submit(self._load_redimnet)
+            model_future = pool.submit(self._load_parakeet)
+            self.session = session_future.result()
+            self.model = model_future.result()
+
+        # so it doesn't read the config every single loop
         self.chunk_ms = config.AUDIO_CHUNK_SIZE_MS
         self.sample_rate = config.AUDIO_SAMPLE_RATE_HZ
         self.context_left = config.CONTEXT_LEFT
         self.context_right = config.CONTEXT_RIGHT
         self.silent_chunks = config.SPEECH_CHUNK_SIZE
-        self.loudness_threshold = config.LOUDNESS_THRESHOLD
         self.chunk_samples = int(self.sample_rate * self.chunk_ms / 1000)
         self.chunk_bytes = self.chunk_samples * 2
+        self.max_utterance_samples = int(self.sample_rate * config.MAX_UTTERANCE_S)
+        self.streaming_embeddings = config.STREAMING_SPEAKER_EMBEDDINGS
+        self.speaker_window = int(self.sample_rate * config.SPEAKER_WINDOW_S)
+        self.speaker_hop = int(self.sample_rate * config.SPEAKER_HOP_S)
         self.similarity_threshold = config.SIMILARITY_THRESHOLD
+        self.interim_transcripts = config.INTERIM_TRANSCRIPTS
+        self.interim_interval = 1.0 / config.INTERIM_MAX_RATE_HZ
+
+        # per websocket session state; see _new_session_state
+        self.sessions = {}
+
+        # how much audio makes it past the VAD to parakeet; reported as audio_stats events
+        self.stats_interval = config.AUDIO_STATS_INTERVAL
+        self.stats_ts = time.time()
+        self.stats = {"chunks": 0, "speech_chunks": 0, "frame_ratio_sum": 0.0}
+
+        # speakers come from EmbeddingDict.json so we can manually add em n stuff; their
+        # averaged centroids are compiled once into the speaker bank & memmapped here
+        with self.startup_phase("speaker bank"):
+            names, centroids = load_speaker_bank()
+        self.speaker_index = SpeakerIndex.from_bank(
+            names, centroids, threshold=self.similarity_threshold
+        )
 
-        # load embeddings in from json so we can manually add em n stuff
-        with open("workers/audio_utils/EmbeddingDict.json") as f:
-            speaker_paths = json.load(f)
-
-        # average their embeddings in indentify_speaker
-        self.known_speakers = {
-            name: np.mean([np.load(p) for p in paths], axis=0)
-            for name, paths in speaker_paths.items()
-        }
+        if config.WARMUP_ENABLED:
+            with self.startup_phase("warmup"):
+                self._warmup()
 
         print(
             f"[AudioWorker] Ready. Chunk: {self.chunk_ms}ms ({self.chunk_bytes} bytes)"
         )
 
-    def speech_checker(self, speech) -> bool:
-        loudness = np.sqrt(
-            np.mean(speech**2)
-        )  # since its a wave between 0 and 1 its squared so its positive, find mean and sqrt it to make it normalize
-        return (
-            loudness > self.loudness_threshold
-        )  # if the mean is very low, the user likely isnt talking
-
-    def get_embedding(self, audio):
-        return self.session.run(None, {"audio": audio})[0][0]
+    def _warmup(self):
+        # a couple seconds of tone + noise; enough to exercise every shape we use live
+        t = np.arange(max(self.speaker_window, self.chunk_samples * 3)) / self.sample_rate
+        audio = 0.1 * np.sin(2 * np.pi * 220 * t) + 0.01 * np.random.randn(len(t))
+        audio = audio.astype(np.float32)
+        chunk = audio[: self.chunk_samples]
+        vad = make_vad()
+
+        def parakeet():
+            with self.model.transcribe_stream(
+                context_size=(self.context_left, self.context_right)
+            ) as transcriber:
+                for i in range(3):
+                    transcriber.add_audio(
+                        mx.array(audio[i * self.chunk_samples : (i + 1) * self.chunk_samples])
+                    )
+                transcriber.result.text
 
-    def cosine_sim(self, a, b):
-        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+        def redimnet():
+            self.get_embedding(chunk.reshape(1, -1))  # short sentence
+            self.get_embedding(audio[: self.speaker_window].reshape(1, -1))  # full window
 
-    def identify_speaker(self, embedding, last_speaker) -> str:
-        # optional so i can convert it to last speaker if it throws None
-        best_name = config.UNKNOWN_SPEAKER
-        best_score = self.similarity_threshold
+        self.run_warmup(
+            {"vad": lambda: vad.is_speech(chunk), "parakeet": parakeet, "redimnet": redimnet},
+            config.WARMUP_ITERATIONS,
+        )
 
-        if last_speaker != config.UNKNOWN_SPEAKER:
-            avg_emb_last_speaker = self.known_speakers[last_speaker]
-            similarity_last_speaker = self.cosine_sim(embedding, avg_emb_last_speaker)
-            if similarity_last_speaker > self.similarity_threshold:
-                best_name = last_speaker
-                best_score = similarity_last_speaker
+    def get_embedding(self, audio):
+        with self.metrics.timer("audio_embedding_seconds"):
+            return self.session.run(None, {"audio": audio})[0][0]
 
-        for person, avg_emb in self.known_speakers.items():
-            similarity = self.cosine_sim(embedding, avg_emb)
-            if similarity > best_score:
-                best_score = similarity
-                best_name = person
+    def identify_speaker(self, embedding, last_speaker) -> str:
+        with self.metrics.timer("audio_identify_seconds"):
+            return self.speaker_index.identify(embedding, last_speaker)
 
-        return best_name
+    def add_speaker(self, name, embedding):
+        # enroll at runtime; adds another centroid if name is already known
+        self.speaker_index.add(name, embedding)
 
     def run(self):
-        self.setup()
-
-        audio_buffer = b""
-        context_size = (self.context_left, self.context_right)
-
-        audio_chunk_holder = []  # this is for storing all chunks to voice recognize at end of sentence
-        last_speaker = config.UNKNOWN_SPEAKER
-
-        # session state
-        session_id = None
-        transcriber = None
-        ctx = None
-        last_text = ""
-        silence_count = 0  # track consecutive silent chunks
+        with self.startup_phase("setup total"):
+            self.setup()
+        self.mark_ready()
 
+        self.start_pipeline()
         try:
             while self.running.is_set():
+                if not self.asr_thread.is_alive():
+                    raise RuntimeError("[AudioWorker] asr thread died")
+                self._handle_commands()
                 try:
-                    raw_bytes = self.input_queue.get(
+                    session, capture_ts, raw_bytes = self.input_queue.get(
                         timeout=1.0
                     )  # so it doesnt block forevers
 
                 except queue.Empty:
+                    self._maybe_emit_stats()
+                    self.report_metrics()
                     continue
                 except Exception as E:
                     print("[Error] ", E)
                     raise RuntimeError
 
-                audio_buffer += raw_bytes
+                # capture (or arrival) -> picked up here
+                self.metrics.observe("audio_queue_wait_seconds", time.time() - capture_ts)
+                if session in self.closed_sessions:  # stragglers after disconnect
+                    continue
+                if session not in self.sessions:
+                    self.sessions[session] = self._new_session_state()
+                with self.metrics.timer("audio_message_seconds"):
+                    self._handle_audio(session, self.sessions[session], raw_bytes, capture_ts)
+                self._maybe_emit_stats()
+                self.report_metrics()
+        finally:
+            self.stop_pipeline()
+
+    # --- pipeline ---
+    # ingest stage (run loop thread): queue -> pcm ring -> vad -> silence counting; cheap,
+    #   so audio keeps being consumed & sentence breaks are found on time while asr is busy
+    # asr stage (own thread): parakeet + redimnet + speech events; owns the utterance buffers
+    # linked by a bounded handoff queue; speech chunks travel in preallocated buffers from a
+    # free list, so a full handoff (asr too far behind) blocks ingest instead of growing
+    # items are ("speech", session, buf, capture ts of buf's first sample), ("end", session),
+    # ("close", session) or None to stop
+
+    def start_pipeline(self):
+        depth = config.ASR_HANDOFF_CHUNKS
+        self.handoff = queue.Queue(maxsize=depth)
+        # one buffer per handoff slot + one being filled by ingest + one being read by asr
+        self.free_chunks = queue.Queue()
+        for _ in range(depth + 2):
+            self.free_chunks.put(np.empty(self.chunk_samples, dtype=np.float32))
+        self.spare_chunk = None  # taken from the free list, not handed off yet
+
+        self.asr_sessions = {}  # asr stage state; only touched by the asr thread
+        self.asr_thread = threading.Thread(target=self._asr_loop, name="asr", daemon=True)
+        self.asr_thread.start()
+
+    def stop_pipeline(self, timeout=5.0):
+        # anything already handed off still gets transcribed & flushed
+        if getattr(self, "asr_thread", None) is None:
+            return
+        self.handoff.put(None)
+        self.asr_thread.join(timeout)
+        if self.asr_thread.is_alive():
+            print("[AudioWorker] asr thread didn't stop in time")
+        self.asr_thread = None
+
+    def _hand_off(self, item):
+        if self.handoff.full():
+            # asr is behind by the whole handoff; this is where backpressure kicks in
+            with self.metrics.timer("audio_handoff_block_seconds"):
+                self.handoff.put(item)
+        else:
+            self.handoff.put(item)
+
+    def _asr_loop(self):
+        while True:
+            item = self.handoff.get()
+            if item is None:
+                break
+            kind, session = item[0], item[1]
+            start = time.perf_counter()
+            try:
+                if kind == "speech":
+                    self._asr_speech(session, item[2], item[3])
+                elif kind == "end":
+                    state = self.asr_sessions.get(session)
+                    if state is not None and state["transcriber"] is not None:
+                        self._end_sentence(session, state)
+                elif kind == "close":
+                    state = self.asr_sessions.pop(session, None)
+                    if state is not None and state["transcriber"] is not None:
+                        self._end_sentence(session, state)
+            except Exception as e:  # one bad chunk shouldn't take the whole worker down
+                print(f"[AudioWorker] asr error ({kind}, session {session}): {e}")
+            finally:
+                if kind == "speech":
+                    self.free_chunks.put(item[2])
+                self.metrics.observe("audio_asr_stage_seconds", time.perf_counter() - start)
+                self.handoff.task_done()
+
+        for state in self.asr_sessions.values():
+            if state["ctx"]:
+                state["ctx"].__exit__(None, None, None)
+
+    def _new_session_state(self) -> dict:
+        # ingest stage state; one per websocket session so two headsets don't mix audio
+        return {
+            "vad": make_vad(),  # keeps its own noise floor, so one per session
+            # incoming pcm lands here; room for a couple of chunks plus one websocket message
+            "pcm": PcmRing(self.chunk_samples, self.chunk_samples * 4),
+            "in_sentence": False,  # speech handed off since the last sentence break
+            "sentence_samples": 0,  # so the utterance cap is enforced before asr sees it
+            "silence_count": 0,  # track consecutive silent chunks
+            "read_ts": 0.0,  # capture time of the next sample read_chunk hands out
+        }
+
+    def _new_asr_state(self) -> dict:
+        # asr stage state per session; everything that used to be locals in run()
+        return {
+            # speech chunks of the sentence in progress, for voice recognition at the end
+            "utterance": UtteranceBuffer(self.max_utterance_samples),
+            "last_speaker": config.UNKNOWN_SPEAKER,
+            "utterance_id": None,
+            "transcriber": None,
+            "ctx": None,
+            "last_text": "",
+            # streaming speaker embedding: running sum of normalized window embeddings
+            "emb_sum": 0.0,
+            "emb_count": 0,
+            "embedded_until": 0,  # utterance sample index the last window ended at
+            "provisional_speaker": None,
+            # interim events: when the last one went out & what text it had
+            "utterance_ts": 0.0,
+            # capture time span of the sentence's speech, for matching against vision
+            "start_ts": 0.0,
+            "end_ts": 0.0,
+            "interim_ts": 0.0,
+            "interim_text": "",
+        }
 
-                while len(audio_buffer) >= self.chunk_bytes:
-                    chunk_bytes = audio_buffer[: self.chunk_bytes]
-                    audio_buffer = audio_buffer[self.chunk_bytes :]
+    def _handle_commands(self):
+        while not self.command_queue.empty():
+            try:
+                command = self.command_queue.get_nowait()
+            except queue.Empty:
+                break
+            if command.get("type") == "close_session":
+                self._close_session(command["session"])
+
+    def _close_session(self, session):
+        # headset disconnected; asr flushes whatever sentence was in progress & drops state
+        self._mark_closed(session)
+        if self.sessions.pop(session, None) is not None:
+            self._hand_off(("close", session))
+
+    def _handle_audio(self, session, state, raw_bytes, capture_ts=None):
+        # capture_ts is when the message's first sample was recorded; whatever is still
+        # buffered came right before it, which pins the capture time of the read position
+        capture_ts = time.time() if capture_ts is None else capture_ts
+        state["read_ts"] = capture_ts - state["pcm"].available() / self.sample_rate
+        data = memoryview(raw_bytes)
+        while data:
+            consumed = state["pcm"].write(data)
+            data = data[consumed:]
+            self._drain_chunks(session, state)
+
+    def _drain_chunks(self, session, state):
+        pcm = state["pcm"]
+
+        while pcm.available() >= self.chunk_samples:
+            # sentence would go over the max length; cut it here so the buffer never grows
+            if state["sentence_samples"] + self.chunk_samples > self.max_utterance_samples:
+                self._hand_off(("end", session))
+                state["in_sentence"] = False
+                state["sentence_samples"] = 0
+
+            # convert straight into a handoff buffer; only handed off if it's speech,
+            # otherwise it's reused for the next chunk
+            if self.spare_chunk is None:
+                self.spare_chunk = self.free_chunks.get()
+            samples = pcm.read_chunk(out=self.spare_chunk)
+            chunk_ts = state["read_ts"]
+            state["read_ts"] += self.chunk_samples / self.sample_rate
+            with self.metrics.timer("audio_vad_seconds"):
+                is_speech = state["vad"].is_speech(samples)  # check if speech
+            self.metrics.inc(
+                "audio_chunks_total", labels={"vad": "speech" if is_speech else "silence"}
+            )
+            self.stats["chunks"] += 1
+            self.stats["speech_chunks"] += is_speech
+            self.stats["frame_ratio_sum"] += state["vad"].last_ratio
+
+            if is_speech:
+                state["silence_count"] = 0  # reset silence counter cus speech
+                state["in_sentence"] = True
+                state["sentence_samples"] += self.chunk_samples
+                self._hand_off(("speech", session, self.spare_chunk, chunk_ts))
+                self.spare_chunk = None
+
+            elif state["in_sentence"]:
+                # silence
+                state["silence_count"] += 1
+
+                if state["silence_count"] >= self.silent_chunks:
+                    # sentence break
+                    self._hand_off(("end", session))
+                    state["in_sentence"] = False
+                    state["sentence_samples"] = 0
+                    state["silence_count"] = 0
+
+    def _asr_speech(self, session, samples, chunk_ts):
+        if session not in self.asr_sessions:
+            self.asr_sessions[session] = self._new_asr_state()
+        state = self.asr_sessions[session]
+        utterance = state["utterance"]
+        # ingest already cut the sentence at the cap, so this always fits
+        utterance.tail(self.chunk_samples)[:] = samples
+        utterance.commit(self.chunk_samples)
+
+        # start new utterance if needed could start with no speech
+        if state["transcriber"] is None:
+            state["utterance_id"] = str(uuid.uuid4())[:8]
+            state["ctx"] = self.model.transcribe_stream(
+                context_size=(self.context_left, self.context_right)
+            )
+            state["transcriber"] = state["ctx"].__enter__()
+            state["last_text"] = ""
+            state["utterance_ts"] = time.time()
+            state["start_ts"] = chunk_ts
+        state["end_ts"] = chunk_ts + self.chunk_samples / self.sample_rate
+
+        with self.metrics.timer("audio_asr_seconds"):
+            state["transcriber"].add_audio(mx.array(samples))
+            text = state["transcriber"].result.text.strip()
+
+        if text and text != state["last_text"]:
+            state["last_text"] = text
+
+        if self.streaming_embeddings:
+            self._update_speaker(session, state)
+        self._emit_interim(session, state)
+
+    def _emit_interim(self, session, state, force=False):
+        # final: False event with the text so far & the provisional speaker
+        # text changes are coalesced to interim_interval; when one gets held back the next
+        # chunk (or the final event) carries the newer text anyway. speaker changes force one
+        text = state["last_text"]
+        now = time.time()
+        if not force:
+            if not self.interim_transcripts or not text or text == state["interim_text"]:
+                return
+            if now - state["interim_ts"] < self.interim_interval:
+                self.metrics.inc("audio_interim_coalesced_total")
+                return
+
+        if text and not state["interim_text"]:
+            # first words out of the sentence; the latency people actually notice
+            self.metrics.observe("audio_first_text_seconds", now - state["utterance_ts"])
+        state["interim_ts"] = now
+        state["interim_text"] = text
+        self.metrics.inc("audio_interim_events_total")
+        self.output_queue.put(
+            events.encode(
+                Speech(
+                    session=session,
+                    id=state["utterance_id"],
+                    text=text,
+                    timestamp=now,
+                    final=False,
+                    name=state["provisional_speaker"] or config.UNKNOWN_SPEAKER,
+                    start_ts=state["start_ts"],
+                    end_ts=state["end_ts"],
+                )
+            )
+        )
 
-                    samples = (
-                        np.frombuffer(chunk_bytes, dtype=np.int16).astype(np.float32)
-                        / 32767.0
+    def report_metrics(self, force=False):
+        self.metrics.set("audio_sessions", len(self.sessions))
+        self.metrics.set("audio_handoff_depth", self.handoff.qsize())
+        super().report_metrics(force)
+
+    def _maybe_emit_stats(self):
+        now = time.time()
+        if now - self.stats_ts < self.stats_interval:
+            return
+        chunks = self.stats["chunks"]
+        self.output_queue.put(
+            {
+                "type": "audio_stats",
+                "chunks": chunks,
+                "speech_chunks": self.stats["speech_chunks"],  # == parakeet add_audio calls
+                "speech_ratio": self.stats["speech_chunks"] / chunks if chunks else 0.0,
+                "frame_speech_ratio": self.stats["frame_ratio_sum"] / chunks
+                if chunks
+                else 0.0,
+            }
+        )
+
+        # counters are per interval
+        self.stats = dict.fromkeys(self.stats, 0)
+        self.stats_ts = now
+
+    def _update_speaker(self, session, state):
+        # sliding window embeddings while they're still talking, so the sentence break only
+        # has at most one window left to embed instead of the whole utterance
+        utterance = state["utterance"]
+        end = len(utterance)
+        if end < self.speaker_window or end - state["embedded_until"] < self.speaker_hop:
+            return
+
+        window = utterance.view(end - self.speaker_window, end).reshape(1, -1)
+        self._add_window_embedding(state, self.get_embedding(window))
+        state["embedded_until"] = end
+
+        speaker = self.identify_speaker(self._pooled_embedding(state), state["last_speaker"])
+        if speaker != state["provisional_speaker"]:
+            state["provisional_speaker"] = speaker
+            # early guess at who's talking; final event confirms or corrects it
+            self._emit_interim(session, state, force=True)
+
+    def _add_window_embedding(self, state, embedding):
+        norm = np.linalg.norm(embedding)
+        if norm > 0:
+            state["emb_sum"] = state["emb_sum"] + embedding / norm
+            state["emb_count"] += 1
+
+    def _pooled_embedding(self, state):
+        return state["emb_sum"] / state["emb_count"]
+
+    def _sentence_embedding(self, state):
+        utterance = state["utterance"]
+        end = len(utterance)
+        if not self.streaming_embeddings or state["emb_count"] == 0:
+            # short (or non streaming) sentence: one pass over everything
+            audio_reshaped = utterance.view().reshape(1, -1)  # to make it 2d arr
+            return self.get_embedding(audio_reshaped)
+
+        # only the tail the sliding windows haven't covered yet, capped at one window
+        if end - state["embedded_until"] >= self.speaker_hop // 2:
+            start = max(0, end - self.speaker_window)
+            self._add_window_embedding(
+                state, self.get_embedding(utterance.view(start, end).reshape(1, -1))
+            )
+        return self._pooled_embedding(state)
+
+    def _end_sentence(self, session, state):
+        # silence -> final event; mostly the leftover speaker embedding
+        with self.metrics.timer("audio_sentence_end_seconds"):
+            self._finish_sentence(session, state)
+        self.metrics.inc("audio_utterances_total")
+
+    def _finish_sentence(self, session, state):
+        embedding = self._sentence_embedding(state)
+        speaker = self.identify_speaker(embedding, state["last_speaker"])
+        state["last_speaker"] = speaker
+
+        if state["last_text"]:
+            self.output_queue.put(
+                events.encode(
+                    Speech(
+                        session=session,
+                        id=state["utterance_id"],
+                        text=state["last_text"],
+                        timestamp=time.time(),
+                        final=True,
+                        name=speaker,
+                        start_ts=state["start_ts"],
+                        end_ts=state["end_ts"],
+                        embedding=embedding,
                     )
-                    is_speech = self.speech_checker(samples)  # check if speech
-
-                    if is_speech:
-                        audio_chunk_holder.append(samples)
-
-                        silence_count = 0  # reset silence counter cus speech
-
-                        # start new session if needed could start with no speech
-                        if transcriber is None:
-                            session_id = str(uuid.uuid4())[:8]
-                            ctx = self.model.transcribe_stream(
-                                context_size=context_size
-                            )
-                            transcriber = ctx.__enter__()
-                            last_text = ""
-
-                        transcriber.add_audio(mx.array(samples))
-                        text = transcriber.result.text.strip()
-
-                        if text and text != last_text:
-                            last_text = text
-
-                    else:
-                        # silence
-                        if transcriber is not None:
-                            silence_count += 1
-
-                            if silence_count >= self.silent_chunks:
-                                # sentence break
-
-                                sentence_audio = np.concatenate(audio_chunk_holder)
-                                audio_reshaped = sentence_audio.reshape(
-                                    1, -1
-                                )  # to make it 2d arr
-                                embedding = self.get_embedding(audio_reshaped)
-                                speaker = self.identify_speaker(embedding, last_speaker)
-                                last_speaker = speaker
-
-                                if last_text:
-                                    self.output_queue.put(
-                                        {
-                                            "type": "speech",
-                                            "text": last_text,
-                                            "id": session_id,
-                                            "timestamp": time.time(),
-                                            "final": True,
-                                            "embedding": embedding,
-                                            "name": speaker,
-                                        }
-                                    )
-                                # close session
-                                ctx.__exit__(None, None, None)
-                                transcriber = None
-                                ctx = None
-                                session_id = None
-                                last_text = ""
-                                silence_count = 0
-                                audio_chunk_holder = []
-        finally:
-            if ctx:
-                ctx.__exit__(None, None, None)
+                )
+            )
+        # close utterance
+        state["ctx"].__exit__(None, None, None)
+        state["transcriber"] = None
+        state["ctx"] = None
+        state["utterance_id"] = None
+        state["last_text"] = ""
+        state["utterance"].reset()
+        state["emb_sum"] = 0.0
+        state["emb_count"] = 0
+        state["embedded_until"] = 0
+        state["provisional_speaker"] = None
+        state["interim_ts"] = 0.0
+        state["interim_text"] = ""
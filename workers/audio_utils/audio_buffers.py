@@ -0,0 +1,82 @@
+# preallocated buffers for the audio worker so the per chunk path doesn't allocate
+# PcmRing: int16 ring the websocket bytes land in; chunks come out converted to float32
+# UtteranceBuffer: float32 samples of the sentence in progress, capped at a max length
+
+import numpy as np
+
+PCM_SCALE = np.float32(1.0 / 32767.0)
+
+
+class PcmRing:
+    def __init__(self, chunk_samples: int, capacity_samples: int):
+        if capacity_samples < chunk_samples:
+            raise ValueError("ring has to hold at least one chunk")
+        self.chunk_samples = chunk_samples
+        self._ring = np.zeros(capacity_samples, dtype=np.int16)
+        self._scratch = np.empty(chunk_samples, dtype=np.float32)
+        self._read = 0  # absolute sample counters; position is counter % capacity
+        self._write = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._ring)
+
+    def available(self) -> int:
+        return self._write - self._read
+
+    def write(self, raw_bytes) -> int:
+        # copies as many whole samples as fit; returns how many bytes were consumed so the
+        # caller can drain chunks and come back with the rest
+        # pcm16 messages are always whole samples, so a stray odd byte just gets dropped
+        data = memoryview(raw_bytes)
+        n = min(len(data) // 2, self.capacity - self.available())
+        pcm = np.frombuffer(data[: n * 2], dtype=np.int16)
+
+        start = self._write % self.capacity
+        first = min(n, self.capacity - start)
+        self._ring[start : start + first] = pcm[:first]
+        self._ring[: n - first] = pcm[first:]
+        self._write += n
+        if n == len(data) // 2:
+            return len(data)
+        return n * 2
+
+    def read_chunk(self, out=None) -> np.ndarray | None:
+        # next chunk_samples as float32 in [-1, 1], converted straight into out (or an
+        # internal scratch that's reused by the next call); None if a full chunk isn't in yet
+        if self.available() < self.chunk_samples:
+            return None
+        out = self._scratch if out is None else out
+        n = self.chunk_samples
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        np.multiply(self._ring[start : start + first], PCM_SCALE, out=out[:first])
+        np.multiply(self._ring[: n - first], PCM_SCALE, out=out[first:n])
+        self._read += n
+        return out[:n]
+
+
+class UtteranceBuffer:
+    def __init__(self, max_samples: int):
+        self._buf = np.empty(max_samples, dtype=np.float32)
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def free(self) -> int:
+        return len(self._buf) - self._len
+
+    def tail(self, n: int) -> np.ndarray:
+        # writable view of the next n free samples; fill it then commit() to keep it
+        return self._buf[self._len : self._len + n]
+
+    def commit(self, n: int):
+        self._len = min(self._len + n, len(self._buf))
+
+    def view(self, start=0, end=None) -> np.ndarray:
+        end = self._len if end is None else min(end, self._len)
+        return self._buf[start:end]
+
+    def reset(self):
+        self._len = 0
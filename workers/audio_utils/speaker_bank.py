@@ -0,0 +1,102 @@
+# compiled speaker bank: the averaged centroid of every speaker in EmbeddingDict.json,
+# written once to a single .npy (+ json metadata) and memmapped by every audio worker
+# rebuilt only when the json or any of the .npy files it lists change (size/mtime)
+# every audio worker may find it stale at startup at once; rebuilds take a file lock and
+# write through per process temp files, and meta (with the hash) is written last so it's
+# the commit marker: matching meta means the centroids next to it are complete
+
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+from core import config
+
+CENTROIDS_FILE = "centroids.npy"
+META_FILE = "meta.json"
+LOCK_FILE = ".lock"
+
+
+def source_hash(dict_path: str) -> str:
+    # hash of the json itself + stat of every listed file; no need to read the .npy files
+    with open(dict_path, "rb") as f:
+        raw = f.read()
+    h = hashlib.sha1(raw)
+    for name, paths in sorted(json.loads(raw).items()):
+        for p in paths:
+            st = os.stat(p)
+            h.update(f"{name}|{p}|{st.st_size}|{st.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+def build_speaker_bank(dict_path: str, bank_dir: str, digest: str):
+    with open(dict_path) as f:
+        speaker_paths = json.load(f)
+
+    names = list(speaker_paths)
+    centroids = np.stack(
+        [np.mean([np.load(p) for p in speaker_paths[name]], axis=0).reshape(-1) for name in names]
+    ).astype(np.float32)
+    centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+    # caller holds the bank lock; centroids first, meta last
+    os.makedirs(bank_dir, exist_ok=True)
+    _write_replace(os.path.join(bank_dir, CENTROIDS_FILE), lambda f: np.save(f, centroids))
+    meta = json.dumps({"names": names, "source_hash": digest}).encode()
+    _write_replace(os.path.join(bank_dir, META_FILE), lambda f: f.write(meta))
+
+
+def _write_replace(path: str, write):
+    # unique temp name per call (two processes never share one), then rename over path
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+@contextmanager
+def _bank_lock(bank_dir: str):
+    # serializes rebuilds across every audio worker process
+    os.makedirs(bank_dir, exist_ok=True)
+    with open(os.path.join(bank_dir, LOCK_FILE), "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _read_meta(bank_dir: str):
+    try:
+        with open(os.path.join(bank_dir, META_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def load_speaker_bank(
+    dict_path=config.SPEAKER_EMBEDDINGS_DICT, bank_dir=config.SPEAKER_BANK_DIR
+):
+    # returns (names, centroids) with centroids a read-only memmap of normalized rows
+    digest = source_hash(dict_path)
+    meta = _read_meta(bank_dir)
+
+    if meta is None or meta.get("source_hash") != digest:
+        with _bank_lock(bank_dir):
+            # another worker may have rebuilt it while we waited for the lock
+            meta = _read_meta(bank_dir)
+            if meta is None or meta.get("source_hash") != digest:
+                print("[AudioWorker] Speaker embeddings changed; rebuilding speaker bank")
+                build_speaker_bank(dict_path, bank_dir, digest)
+                meta = _read_meta(bank_dir)
+
+    centroids = np.load(os.path.join(bank_dir, CENTROIDS_FILE), mmap_mode="r")
+    return meta["names"], centroids
@@ -0,0 +1,76 @@
+import numpy as np
+
+from core import config
+
+
+class SpeakerIndex:
+    # every enrolled speaker centroid, pre-normalized, in one matrix; a speaker can have
+    # several centroids (different mics, rooms, ...) and gets the best of them
+    # identify() is one matmul over everyone instead of a python loop of cosine sims
+
+    def __init__(
+        self,
+        threshold=config.SIMILARITY_THRESHOLD,
+        stickiness=config.SPEAKER_STICKINESS,
+    ):
+        self.threshold = threshold
+        self.stickiness = stickiness  # bonus for whoever spoke last; same person usually keeps talking
+        self.names = []  # speaker id -> name
+        self._name_to_id = {}
+        self._centroids = np.empty((0, 0), dtype=np.float32)
+        self._name_ids = np.empty(0, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_bank(cls, names, centroids, **kwargs):
+        # one already normalized centroid per name, e.g. a memmap from the speaker bank
+        index = cls(**kwargs)
+        index.names = list(names)
+        index._name_to_id = {name: i for i, name in enumerate(index.names)}
+        index._centroids = centroids
+        index._name_ids = np.arange(len(index.names), dtype=np.int32)
+        return index
+
+    def add(self, name: str, centroid: np.ndarray):
+        # adds one more centroid for name (new speaker or not); fine to call at runtime
+        row = np.asarray(centroid, dtype=np.float32).reshape(1, -1)
+        row = row / max(float(np.linalg.norm(row)), 1e-12)
+        if name not in self._name_to_id:
+            self._name_to_id[name] = len(self.names)
+            self.names.append(name)
+
+        if self._centroids.size == 0:
+            self._centroids = row
+        else:
+            self._centroids = np.vstack([self._centroids, row])
+        self._name_ids = np.append(self._name_ids, self._name_to_id[name]).astype(
+            np.int32
+        )
+
+    def person_scores(self, embedding: np.ndarray) -> np.ndarray:
+        # cosine sim against every centroid, max-pooled per speaker -> (speakers,)
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = self._centroids @ query
+        pooled = np.full(len(self.names), -np.inf, dtype=np.float32)
+        np.maximum.at(pooled, self._name_ids, scores)
+        return pooled
+
+    def identify(self, embedding: np.ndarray, last_speaker=config.UNKNOWN_SPEAKER) -> str:
+        if not self.names:
+            return config.UNKNOWN_SPEAKER
+
+        scores = self.person_scores(embedding)
+        # only speakers over the threshold are candidates; the last speaker's bias just
+        # breaks near ties in their favor
+        bias = np.zeros_like(scores)
+        if last_speaker in self._name_to_id:
+            bias[self._name_to_id[last_speaker]] = self.stickiness
+        ranked = np.where(scores > self.threshold, scores + bias, -np.inf)
+
+        best = int(np.argmax(ranked))
+        if ranked[best] == -np.inf:
+            return config.UNKNOWN_SPEAKER
+        return self.names[best]
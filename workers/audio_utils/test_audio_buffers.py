@@ -0,0 +1,57 @@
+import numpy as np
+
+from workers.audio_utils.audio_buffers import PCM_SCALE, PcmRing
+
+
+def stream(ring, messages) -> np.ndarray:
+    # what the audio worker does: write, drain every whole chunk, write the rest
+    out = []
+    for msg in messages:
+        while msg:
+            consumed = ring.write(msg)
+            msg = msg[consumed:]
+            while (chunk := ring.read_chunk()) is not None:
+                out.append(chunk.copy())  # scratch gets reused by the next read
+    return np.concatenate(out) if out else np.empty(0, np.float32)
+
+
+def test_random_writes_come_out_in_order_and_scaled():
+    rng = np.random.default_rng(0)
+    pcm = rng.integers(-32768, 32768, 5000, dtype=np.int16)
+    pcm[:2] = (-32767, 32767)  # full scale
+    raw = pcm.tobytes()
+
+    # messages of 1..40 samples through a ring that wraps every 24
+    cuts = np.cumsum(rng.integers(1, 41, 400)) * 2
+    cuts = cuts[cuts < len(raw)]
+    messages = [raw[a:b] for a, b in zip([0, *cuts], [*cuts, len(raw)])]
+
+    ring = PcmRing(chunk_samples=10, capacity_samples=24)
+    out = stream(ring, messages)
+
+    n = len(pcm) // 10 * 10
+    assert len(out) == n and out.dtype == np.float32
+    np.testing.assert_array_equal(out, pcm[:n] * PCM_SCALE)
+    assert out[0] == -1.0 and out[1] == 1.0
+    assert ring.available() == len(pcm) - n  # tail waits for the next message
+
+
+def test_partial_write_hands_back_the_rest():
+    ring = PcmRing(chunk_samples=4, capacity_samples=6)
+    raw = np.arange(1, 11, dtype=np.int16).tobytes()
+
+    assert ring.write(raw) == 12  # only 6 samples fit
+    assert ring.write(raw[12:]) == 0
+    np.testing.assert_array_equal(ring.read_chunk(), np.arange(1, 5) * PCM_SCALE)
+    assert ring.write(raw[12:]) == 8  # 4 free again; wraps to the front
+    np.testing.assert_array_equal(ring.read_chunk(), np.arange(5, 9) * PCM_SCALE)
+    assert ring.read_chunk() is None  # 9 & 10 wait for more
+
+
+def test_odd_trailing_byte_is_dropped():
+    ring = PcmRing(chunk_samples=2, capacity_samples=4)
+    raw = np.array([100, -100], dtype=np.int16).tobytes() + b"\x7f"
+
+    assert ring.write(raw) == len(raw)
+    assert ring.available() == 2
+    np.testing.assert_array_equal(ring.read_chunk(), np.array([100, -100]) * PCM_SCALE)
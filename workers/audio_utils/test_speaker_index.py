@@ -0,0 +1,57 @@
+import numpy as np
+
+from core import config
+from workers.audio_utils.speaker_index import SpeakerIndex
+
+
+def embedding(*weights):
+    # unit vectors 0 & 1 are matt & shaun; weights mix them
+    return np.asarray(weights + (0.0,) * (4 - len(weights)), dtype=np.float32)
+
+
+def index(**kwargs):
+    idx = SpeakerIndex(threshold=0.5, stickiness=0.05, **kwargs)
+    idx.add("matt", embedding(1.0))
+    idx.add("shaun", embedding(0.0, 1.0))
+    return idx
+
+
+def test_best_match_wins():
+    assert index().identify(embedding(1.0, 0.2)) == "matt"
+    assert index().identify(embedding(0.2, 1.0)) == "shaun"
+
+
+def test_last_speaker_wins_near_ties():
+    idx = index()
+    near_tie = embedding(1.0, 0.95)  # slightly closer to matt
+    assert idx.identify(near_tie) == "matt"
+    assert idx.identify(near_tie, last_speaker="shaun") == "shaun"
+
+
+def test_stickiness_does_not_override_a_clear_winner():
+    assert index().identify(embedding(1.0, 0.5), last_speaker="shaun") == "matt"
+
+
+def test_stickiness_does_not_lift_last_speaker_over_threshold():
+    # shaun scores ~0.47 (under 0.5); the bonus would push him over but he isn't a candidate
+    idx = index()
+    query = embedding(0.2, 0.47, 0.86)
+    assert idx.identify(query, last_speaker="shaun") == config.UNKNOWN_SPEAKER
+
+
+def test_below_threshold_and_empty_index_are_unknown():
+    assert index().identify(embedding(0.0, 0.0, 1.0)) == config.UNKNOWN_SPEAKER
+    assert SpeakerIndex().identify(embedding(1.0)) == config.UNKNOWN_SPEAKER
+
+
+def test_extra_centroid_for_known_speaker_is_max_pooled():
+    idx = index()
+    idx.add("matt", embedding(0.0, 0.0, 1.0))  # second mic
+    assert idx.names == ["matt", "shaun"]
+    assert idx.identify(embedding(0.0, 0.1, 1.0)) == "matt"
+
+
+def test_from_bank_matches_add():
+    centroids = np.eye(4, dtype=np.float32)[:2]
+    idx = SpeakerIndex.from_bank(["matt", "shaun"], centroids, threshold=0.5)
+    assert idx.identify(embedding(0.2, 1.0)) == "shaun"
@@ -0,0 +1,125 @@
+# voice activity detection for the audio worker
+# decides per chunk whether it's worth feeding to parakeet; one instance per session since
+# the spectral detector keeps noise floor & hysteresis state between chunks
+
+import numpy as np
+
+from core import config
+
+
+class RmsVAD:
+    # the original check: one loudness threshold over the whole chunk
+
+    def __init__(self, threshold=config.LOUDNESS_THRESHOLD):
+        self.threshold = threshold
+        self.last_ratio = 0.0  # fraction of speech frames in the last chunk (0 or 1 here)
+
+    def is_speech(self, samples: np.ndarray) -> bool:
+        loudness = np.sqrt(
+            np.mean(samples**2)
+        )  # since its a wave between 0 and 1 its squared so its positive, find mean and sqrt it to make it normalize
+        speech = loudness > self.threshold  # if the mean is very low, the user likely isnt talking
+        self.last_ratio = float(speech)
+        return bool(speech)
+
+
+class SpectralVAD:
+    # frame level decisions on speech band energy (300-3400Hz) vs an adaptive noise floor
+    # - all frames of a chunk go through one batched rfft
+    # - hysteresis: a frame has to clear floor + enter_db to start speech, and speech only
+    #   ends once energy drops under floor + exit_db
+    # - hangover keeps speech on for a few frames so word gaps don't cut utterances
+    # - noise floor is the minimum frame energy over the last few seconds (minimum
+    #   statistics); speech always has dips between words, so the floor follows the room
+    #   and a steady hum stops reading as someone talking once it fills the window
+
+    def __init__(
+        self,
+        sample_rate=config.AUDIO_SAMPLE_RATE_HZ,
+        frame_ms=config.VAD_FRAME_MS,
+        enter_db=config.VAD_ENTER_DB,
+        exit_db=config.VAD_EXIT_DB,
+        min_db=config.VAD_MIN_DB,
+        hangover_frames=config.VAD_HANGOVER_FRAMES,
+        min_speech_ratio=config.VAD_MIN_SPEECH_RATIO,
+        adapt_noise_floor=config.VAD_ADAPT_NOISE_FLOOR,
+        noise_floor_db=config.VAD_NOISE_FLOOR_DB,
+        noise_window_ms=config.VAD_NOISE_WINDOW_MS,
+    ):
+        self.frame_len = int(sample_rate * frame_ms / 1000)
+        self.enter_db = enter_db
+        self.exit_db = exit_db
+        self.min_db = min_db
+        self.hangover_frames = hangover_frames
+        self.min_speech_ratio = min_speech_ratio
+        self.adapt_noise_floor = adapt_noise_floor
+        self.noise_floor_db = noise_floor_db
+        # recent frame energies for the floor; starts full of the initial floor guess
+        self.history = np.full(
+            max(1, noise_window_ms // frame_ms), noise_floor_db, dtype=np.float32
+        )
+        self.history_pos = 0
+
+        self.window = np.hanning(self.frame_len).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.frame_len, 1.0 / sample_rate)
+        self.band = (freqs >= 300) & (freqs <= 3400)
+        # scale so a full band sine at amplitude a reads as ~a^2/2, same as the time domain
+        self.scale = 2.0 / (self.frame_len * np.sum(self.window**2))
+
+        self.in_speech = False
+        self.hangover = 0
+        self.last_ratio = 0.0
+
+    def frame_energies_db(self, samples: np.ndarray) -> np.ndarray:
+        n_frames = len(samples) // self.frame_len
+        frames = samples[: n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        spectrum = np.fft.rfft(frames * self.window, axis=1)
+        power = (spectrum.real**2 + spectrum.imag**2)[:, self.band].sum(axis=1)
+        return 10.0 * np.log10(power * self.scale + 1e-12)
+
+    def is_speech(self, samples: np.ndarray) -> bool:
+        energies = self.frame_energies_db(samples)
+        if len(energies) == 0:
+            return self.in_speech
+
+        if self.adapt_noise_floor:
+            self._update_noise_floor(energies)
+
+        speech_frames = 0
+        for energy in energies:  # ~20 frames per chunk; state carries across frames
+            above_floor = energy - self.noise_floor_db
+            if self.in_speech:
+                active = above_floor > self.exit_db and energy > self.min_db
+            else:
+                active = above_floor > self.enter_db and energy > self.min_db
+
+            if active:
+                self.in_speech = True
+                self.hangover = self.hangover_frames
+            elif self.hangover > 0:
+                self.hangover -= 1
+            else:
+                self.in_speech = False
+
+            speech_frames += self.in_speech
+
+        self.last_ratio = speech_frames / len(energies)
+        return self.last_ratio >= self.min_speech_ratio
+
+    def _update_noise_floor(self, energies):
+        n = len(energies)
+        if n >= len(self.history):
+            self.history[:] = energies[-len(self.history) :]
+            self.history_pos = 0
+        else:
+            idx = (self.history_pos + np.arange(n)) % len(self.history)
+            self.history[idx] = energies
+            self.history_pos = (self.history_pos + n) % len(self.history)
+        # digital silence shouldn't drag the floor so low that any hiss counts as speech
+        self.noise_floor_db = max(float(self.history.min()), self.min_db - 30.0)
+
+
+def make_vad():
+    if config.VAD_ENGINE == "rms":
+        return RmsVAD()
+    return SpectralVAD()
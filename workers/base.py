@@ -4,22 +4,91 @@
 # ingests from an input queue stored in a global mem system and does whatever it needs for processing
 
 import multiprocessing as mp
+import time
+from contextlib import contextmanager
+
+from core import config
+from core.metrics import Metrics
+
 
 class BaseWorker(mp.Process):
-    def __init__(self):  # gotta comm via queue; could look into shared memory or pipe if queue too slow
+    def __init__(self, status_queue=None):  # gotta comm via queue; could look into shared memory or pipe if queue too slow
         super().__init__(daemon=True)
         self.running = mp.Event()
         self.running.set()
 
+        # set once setup is done (models loaded); the server holds ingest until then
+        self.ready = mp.Event()
+        self.status_queue = status_queue  # startup timings back to the parent
+        self.metrics = Metrics()  # per stage timings/counters; snapshots go up the status queue
+
     def run(self):
         raise NotImplementedError
 
     def shutdown(self):
         self.running.clear()
 
+    @contextmanager
+    def startup_phase(self, phase):
+        # times a chunk of setup; logged here & reported to the parent for /ready
+        start = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - start
+        print(f"[{self.name}] {phase}: {seconds:.2f}s")
+        self._report_status({"type": "startup_phase", "phase": phase, "seconds": seconds})
+
+    def run_warmup(self, steps, iterations):
+        # push synthetic input through each model so first-call costs (graph init, allocator,
+        # jit) are paid before real traffic; first & last pass timings both get reported
+        timings = {name: [] for name in steps}
+        for _ in range(iterations):
+            for name, step in steps.items():
+                start = time.perf_counter()
+                step()
+                timings[name].append(time.perf_counter() - start)
+
+        for name, runs in timings.items():
+            print(
+                f"[{self.name}] warmup {name}: first {runs[0] * 1000:.1f}ms, last {runs[-1] * 1000:.1f}ms"
+            )
+            self._report_status(
+                {"type": "startup_phase", "phase": f"warmup {name} first", "seconds": runs[0]}
+            )
+            self._report_status(
+                {"type": "startup_phase", "phase": f"warmup {name} last", "seconds": runs[-1]}
+            )
+
+    def report_metrics(self, force=False):
+        # cheap to call every loop iteration; only sends once per METRICS_INTERVAL
+        if force or self.metrics.due():
+            self._report_status({"type": "metrics", "metrics": self.metrics.snapshot()})
+
+    def mark_ready(self):
+        # warmup runs through the same instrumented code; only count real traffic
+        self.metrics = Metrics()
+        self.ready.set()
+        self._report_status({"type": "ready"})
+
+    def _report_status(self, status):
+        if self.status_queue is not None:
+            self.status_queue.put({"worker": self.name, **status})
+
 
 class IngestionWorker(BaseWorker):
-    def __init__(self, input_queue, output_queue):
-        super().__init__()
+    def __init__(self, input_queue, output_queue, status_queue=None):
+        super().__init__(status_queue)
         self.input_queue=input_queue
-        self.output_queue = output_queue
\ No newline at end of file
+        self.output_queue = output_queue
+        # closed session id -> when it closed; stragglers for these get dropped
+        self.closed_sessions = {}
+
+    def _mark_closed(self, session):
+        # ids come from an ever increasing counter & never come back, so an entry is only
+        # useful until that session's queued stragglers have gone by; forget it after that
+        now = time.time()
+        self.closed_sessions[session] = now
+        expired = [
+            s for s, ts in self.closed_sessions.items() if now - ts > config.CLOSED_SESSION_GRACE
+        ]
+        for s in expired:
+            del self.closed_sessions[s]
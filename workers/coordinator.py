@@ -3,27 +3,43 @@
 
 import multiprocessing as mp
 import queue
+import time
+from functools import singledispatchmethod
 
+from core import events
+from core.events import Speech, VisionResult
 from workers.base import BaseWorker
+from workers.coordinator_utils.fusion import Fusion
 
 
 class Coordinator(BaseWorker):
-    def __init__(self, results_queue: mp.Queue):
-        super().__init__()
+    def __init__(self, results_queue: mp.Queue, status_queue=None):
+        super().__init__(status_queue)
         self.results_queue = results_queue
-        # self.audio_events
-        # self.vision_events
+        # time indexed audio & vision events + who's on screen per session
+        self.fusion = Fusion()
+        self._evicted_ts = 0.0
 
         # maybe more; hold past actions taken by self maybe? or a state, like what's happening in the world rn?
         # again, decision making module given the initial processing by the workers
 
     def run(self):
         print("[Coordinator] Started")
+        self.mark_ready()  # nothing to load
         try:
             while self.running.is_set():
+                self.report_metrics()
+                self._evict()
                 try:
-                    event = self.results_queue.get(timeout=0.1)
-                    self._handle_event(event)
+                    item = self.results_queue.get(timeout=0.1)
+                    # vision_result & speech come in as bytes (core/events.py); stats are dicts
+                    event = events.decode(item) if isinstance(item, bytes) else item
+                    event_type = event["type"] if isinstance(event, dict) else event.type
+                    with self.metrics.timer(
+                        "coordinator_event_seconds", {"type": event_type}
+                    ):
+                        self._handle_event(event)
+                    self.metrics.inc("coordinator_events_total", labels={"type": event_type})
                 except queue.Empty:
                     continue
                 except KeyboardInterrupt:
@@ -31,50 +47,75 @@ class Coordinator(BaseWorker):
         finally:
             print("[Coordinator] Shutting down")
 
+    def _evict(self):
+        # ~once a second; events are aged against their own session's newest capture time so
+        # a stalled queue or a client with a skewed clock doesn't lose events still to be matched
+        now = time.time()
+        if now - self._evicted_ts < 1.0:
+            return
+        self._evicted_ts = now
+        self.fusion.evict()
+        self.metrics.set("fusion_store_events", len(self.fusion.store))
+
+    # handling events; dispatched on the event's class
+    # for instance if event type is a face in view, we throw it on the picture or sum
+
+    @singledispatchmethod
     def _handle_event(self, event):
-        # handling events; gotta coordinate event data format
-        # for instance if event type is a face in view, we throw it on the picture or sum
+        print("\n[Coordinator] got other event")
+
+    @_handle_event.register
+    def _(self, event: VisionResult):
+        # session (websocket session), timestamp (frame capture), keyframe, removed (track ids
+        # gone since the last event) & faces, a list of events.Face:
+        #   track_id, bbox (x1, y1, x2, y2), name, score, emb (None unless requested)
+        # keyframes list every visible track; other events only the tracks that appeared,
+        # changed name or moved, so keep the last keyframe + deltas for the full picture
+
+        # fusion does exactly that & stores a snapshot of it for matching against speech
+        self.fusion.add_vision(event)
 
+    @_handle_event.register
+    def _(self, event: Speech):
+        # session (websocket session the audio came from), id (utterance), text (the
+        # transcription so far), timestamp, final, name (speaker), start_ts / end_ts (capture
+        # time span of the speech), embedding (final only)
+        # non final events are interim text / provisional speaker guesses mid sentence
+        marker = "" if event.final else " (so far)"
+        print(f"[Coordinator] ({event.session}) {event.name}{marker}: {event.text}")
+        if not event.final:
+            return
+
+        # finished utterance: match it against whoever was on screen while it was said
+        self.fusion.add_speech(event)
+        with self.metrics.timer("fusion_seconds"):
+            attribution = self.fusion.attribute(event)
+        self.metrics.inc("fusion_attributions_total", labels={"method": attribution.method})
+        if attribution.track_id is not None:
+            print(
+                f"[Coordinator] ({event.session}) -> {attribution.name} on screen "
+                f"(track {attribution.track_id}, {attribution.method})"
+            )
+
+    @_handle_event.register
+    def _(self, event: dict):
         event_type = event.get("type", "unknown")
 
-        if event_type == "vision_result":
-            # given list of the following:
-            """{
-                "track_id": track_id,
-                "bbox": (x1, y1, x2, y2),
-                "name": self.active_identities[track_id]["name"],
-                "score": self.active_identities[track_id]["score"],
-                "emb": emb
-            }"""
-
-            # potential code to work with input faces; nothing for now, too many frames
-            """
-            faces = event.get("faces", [])
-            if faces:
-                print(f"\n [Coordinator] Vision Event: detected {len(faces)} faces")
-                for face in faces:
-                    _name = face.get("name", "Unknown")
-                    _score = face.get("score", 0.0)
-                    _bbox = face.get("bbox")
-                    # print(f" - ID: {face['track_id']} | Name: {name} ({score:.2f}) | Loc: {bbox}")
-
-            """
-            pass
-
-        elif event_type == "speech":
-            # given:
-            """
-            "type": "speech",
-            "text": text,    (would be the audio transcription)
-            "id": session_id,
-            "timestamp": time.time(),
-            "final": False,
-            "name": Unkown,
-            "embedding":
-            """
-            print(f"[Coordinator] {event['name']}: {event['text']}")
+        if event_type == "vision_stats":
+            # periodic counters from the vision worker; latency is arrival -> result
+            print(
+                f"[Coordinator] Vision: {event['frames_processed']} processed, "
+                f"{event['frames_skipped']} skipped, {event['frames_stale']} stale, "
+                f"{event['frames_static']} static, "
+                f"latency avg {event['latency_avg'] * 1000:.0f}ms max {event['latency_max'] * 1000:.0f}ms"
+            )
+
+        elif event_type == "audio_stats":
+            # periodic counters from the audio worker; speech chunks are what reach parakeet
+            print(
+                f"[Coordinator] Audio: {event['speech_chunks']}/{event['chunks']} chunks speech "
+                f"({event['speech_ratio']:.0%}), frame speech ratio {event['frame_speech_ratio']:.0%}"
+            )
 
         else:
             print("\n[Coordinator] got other event")
-
-        return
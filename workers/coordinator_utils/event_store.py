@@ -0,0 +1,124 @@
+# time indexed event store for the coordinator
+# one TimeRing per (session, stream): events kept sorted by capture time so "what happened
+# between t0 and t1" is two bisects instead of a scan. memory is bounded both by count and
+# by age; sessions that stop sending get dropped on evict()
+# every session's timestamps come from its own client clock, so ages are only ever compared
+# within a session; whether a session went quiet is judged on this process's own clock
+
+import bisect
+import time
+
+from core import config
+
+
+class TimeRing:
+    # amortized ring: appends go on the end of a list & eviction just moves a start offset;
+    # the dead prefix gets cut off once it's as long as the live part, so it's O(1)
+    # amortized and the list is never more than ~2x capacity. timestamps stay sorted, so
+    # lookups bisect over [start:]
+
+    def __init__(self, capacity=config.FUSION_STORE_MAX_EVENTS, max_age=config.FUSION_STORE_SECONDS):
+        self.capacity = capacity
+        self.max_age = max_age
+        self._ts = []
+        self._items = []
+        self._start = 0
+
+    def __len__(self):
+        return len(self._ts) - self._start
+
+    @property
+    def newest_ts(self):
+        return self._ts[-1] if len(self) else None
+
+    def append(self, ts: float, item):
+        if not len(self) or ts >= self._ts[-1]:
+            self._ts.append(ts)
+            self._items.append(item)
+        else:  # out of order (rare); still keep it sorted
+            i = bisect.bisect_right(self._ts, ts, lo=self._start)
+            self._ts.insert(i, ts)
+            self._items.insert(i, item)
+        self.evict(self._ts[-1])
+
+    def evict(self, now: float):
+        # drop by count, then by age relative to now (a timestamp on this ring's clock)
+        start = max(self._start, len(self._ts) - self.capacity)
+        start = max(start, bisect.bisect_left(self._ts, now - self.max_age, lo=start))
+        self._start = start
+        if self._start and self._start >= len(self):
+            del self._ts[: self._start]
+            del self._items[: self._start]
+            self._start = 0
+
+    def window(self, t0: float, t1: float, include_prior=False) -> list:
+        # (ts, item) for every event with t0 <= ts <= t1; include_prior also returns the last
+        # event before t0, i.e. the state that was current when the window opened
+        lo = bisect.bisect_left(self._ts, t0, lo=self._start)
+        hi = bisect.bisect_right(self._ts, t1, lo=lo)
+        if include_prior and lo > self._start:
+            lo -= 1
+        return list(zip(self._ts[lo:hi], self._items[lo:hi]))
+
+    def at(self, t: float):
+        # latest (ts, item) at or before t; None if nothing that old is kept
+        i = bisect.bisect_right(self._ts, t, lo=self._start)
+        if i == self._start:
+            return None
+        return self._ts[i - 1], self._items[i - 1]
+
+
+class EventStore:
+    def __init__(
+        self,
+        capacity=config.FUSION_STORE_MAX_EVENTS,
+        max_age=config.FUSION_STORE_SECONDS,
+    ):
+        self.capacity = capacity
+        self.max_age = max_age
+        self._rings = {}  # (session, stream) -> TimeRing
+        self._touched = {}  # (session, stream) -> time.monotonic() of the last add
+
+    def ring(self, session: int, stream: str) -> TimeRing:
+        key = (session, stream)
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = TimeRing(self.capacity, self.max_age)
+        return ring
+
+    def add(self, session: int, stream: str, ts: float, item):
+        self.ring(session, stream).append(ts, item)
+        self._touched[(session, stream)] = time.monotonic()
+
+    def window(self, session, stream, t0, t1, include_prior=False) -> list:
+        ring = self._rings.get((session, stream))
+        return ring.window(t0, t1, include_prior) if ring is not None else []
+
+    def at(self, session, stream, t):
+        ring = self._rings.get((session, stream))
+        return ring.at(t) if ring is not None else None
+
+    def evict(self, now=None):
+        # rings only evict when they get new events. this ages every ring against the newest
+        # event of its own session (e.g. old vision while only speech comes in) & drops rings
+        # that got nothing for max_age (closed sessions); now is time.monotonic()
+        now = time.monotonic() if now is None else now
+        quiet = [key for key, ts in self._touched.items() if now - ts > self.max_age]
+        for key in quiet:
+            del self._rings[key]
+            del self._touched[key]
+
+        newest = {}  # session -> newest timestamp on that session's clock
+        for (session, _), ring in self._rings.items():
+            if ring.newest_ts is not None:
+                newest[session] = max(newest.get(session, ring.newest_ts), ring.newest_ts)
+        for (session, _), ring in self._rings.items():
+            if session in newest:
+                ring.evict(newest[session])
+
+    def __contains__(self, key):
+        # key: (session, stream)
+        return key in self._rings
+
+    def __len__(self):
+        return sum(len(ring) for ring in self._rings.values())
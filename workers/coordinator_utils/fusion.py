@@ -0,0 +1,94 @@
+# audio-vision fusion: attributes each finished utterance to the face tracks that were on
+# screen while it was spoken
+# vision events are folded into a per session "who's visible" set (keyframe + deltas) and a
+# snapshot of it goes into the event store at every change; an utterance's capture window
+# then only needs the snapshots inside it (+ the one just before it) out of the store
+
+from typing import NamedTuple
+
+from core import config
+from core.events import Speech, VisionResult
+from workers.coordinator_utils.event_store import EventStore
+
+
+class Attribution(NamedTuple):
+    method: str  # "voice_face", "sole_face", "off_screen" or "none"
+    track_id: int | None  # face track the utterance is attributed to
+    name: str  # best guess at who said it
+    visible: dict  # track_id -> (name, fraction of the utterance on screen)
+
+
+class Fusion:
+    def __init__(
+        self,
+        store=None,
+        hold=config.FUSION_VISION_HOLD,
+        min_visible=config.FUSION_MIN_VISIBLE,
+    ):
+        self.store = EventStore() if store is None else store
+        self.hold = hold
+        self.min_visible = min_visible
+        self.visible = {}  # session -> {track_id: Face} as of the latest vision event
+
+    def add_vision(self, event: VisionResult):
+        tracks = self.visible.setdefault(event.session, {})
+        if event.keyframe:
+            tracks.clear()
+        for track_id in event.removed:
+            tracks.pop(track_id, None)
+        for face in event.faces:
+            tracks[face.track_id] = face
+
+        # everything on screen from this event until the next one
+        snapshot = tuple((face.track_id, face.name) for face in tracks.values())
+        self.store.add(event.session, "vision", event.timestamp, snapshot)
+
+    def add_speech(self, event: Speech):
+        self.store.add(event.session, "speech", event.end_ts, event)
+
+    def visible_during(self, session: int, t0: float, t1: float) -> dict:
+        # track_id -> (name, fraction of [t0, t1] on screen); each snapshot holds until the
+        # next one, but never longer than hold (vision stalled or session went quiet)
+        snapshots = self.store.window(session, "vision", t0, t1, include_prior=True)
+        span = max(t1 - t0, 1e-6)
+        seen = {}
+        for i, (ts, snapshot) in enumerate(snapshots):
+            end = snapshots[i + 1][0] if i + 1 < len(snapshots) else t1
+            start, end = max(ts, t0), min(end, ts + self.hold, t1)
+            if end <= start:
+                continue
+            for track_id, name in snapshot:
+                _, seconds = seen.get(track_id, (name, 0.0))
+                seen[track_id] = (name, seconds + end - start)  # latest name wins
+        return {track_id: (name, seconds / span) for track_id, (name, seconds) in seen.items()}
+
+    def attribute(self, speech: Speech) -> Attribution:
+        visible = self.visible_during(speech.session, speech.start_ts, speech.end_ts)
+        candidates = {
+            track_id: (name, frac)
+            for track_id, (name, frac) in visible.items()
+            if frac >= self.min_visible
+        }
+
+        if speech.name != config.UNKNOWN_SPEAKER:
+            # voice recognized & that same person is on screen
+            matches = [tid for tid, (name, _) in candidates.items() if name == speech.name]
+            if matches:
+                track_id = max(matches, key=lambda tid: candidates[tid][1])
+                return Attribution("voice_face", track_id, speech.name, visible)
+            # known voice, nobody matching in view (or the wearer talking)
+            return Attribution("off_screen", None, speech.name, visible)
+
+        if len(candidates) == 1:
+            # unknown voice but only one face around; most likely them
+            (track_id, (name, _)), = candidates.items()
+            return Attribution("sole_face", track_id, name, visible)
+
+        return Attribution("none", None, speech.name, visible)
+
+    def evict(self):
+        # each session is aged on its own capture clock; see EventStore.evict
+        self.store.evict()
+        # sessions whose vision ring got dropped are gone; forget who they had on screen
+        for session in [s for s in self.visible if (s, "vision") not in self.store]:
+            del self.visible[session]
@@ -0,0 +1,91 @@
+import time
+
+from core.events import Face, Speech, VisionResult
+from workers.coordinator_utils.event_store import EventStore, TimeRing
+from workers.coordinator_utils.fusion import Fusion
+
+
+def test_ring_evicts_by_count():
+    ring = TimeRing(capacity=5, max_age=1000)
+    for i in range(20):
+        ring.append(float(i), i)
+    assert len(ring) == 5
+    assert [item for _, item in ring.window(0, 100)] == [15, 16, 17, 18, 19]
+    assert len(ring._ts) <= 2 * ring.capacity  # dead prefix gets compacted
+
+
+def test_ring_evicts_by_age_of_newest():
+    ring = TimeRing(capacity=100, max_age=10)
+    for ts in (0.0, 5.0, 9.0, 16.0):
+        ring.append(ts, ts)
+    assert [ts for ts, _ in ring.window(0, 100)] == [9.0, 16.0]
+
+
+def test_out_of_order_append_stays_sorted():
+    ring = TimeRing(capacity=10, max_age=100)
+    for ts in (1.0, 3.0, 2.0):
+        ring.append(ts, ts)
+    assert [ts for ts, _ in ring.window(0, 10)] == [1.0, 2.0, 3.0]
+
+
+def test_window_and_at():
+    ring = TimeRing(capacity=10, max_age=100)
+    for ts in (1.0, 2.0, 3.0, 4.0):
+        ring.append(ts, ts)
+    assert [ts for ts, _ in ring.window(2.5, 3.5)] == [3.0]
+    assert [ts for ts, _ in ring.window(2.5, 3.5, include_prior=True)] == [2.0, 3.0]
+    assert ring.at(2.9) == (2.0, 2.0)
+    assert ring.at(0.5) is None
+
+
+def test_store_ages_each_session_on_its_own_clock():
+    store = EventStore(capacity=100, max_age=10)
+    store.add(1, "vision", 1000.0, "a")  # client clocks 300s apart
+    store.add(2, "vision", 1300.0, "b")
+    store.evict()
+    assert len(store) == 2
+
+    # speech moved session 1's clock on; its old vision falls out, session 2 is untouched
+    store.add(1, "speech", 1020.0, "s")
+    store.evict()
+    assert store.window(1, "vision", 0, 2000) == []
+    assert store.window(2, "vision", 0, 2000) == [(1300.0, "b")]
+
+
+def test_store_drops_quiet_sessions():
+    store = EventStore(capacity=100, max_age=10)
+    store.add(1, "vision", 5.0, "a")
+    store.evict(now=time.monotonic() + 11)
+    assert (1, "vision") not in store and len(store) == 0
+
+
+def test_fusion_attribution():
+    fusion = Fusion(store=EventStore(capacity=100, max_age=100), hold=3.0, min_visible=0.5)
+    alice = Face(1, (0, 0, 10, 10), "Alice", 0.9)
+    stranger = Face(2, (20, 0, 30, 10), "Unknown", 0.0)
+    fusion.add_vision(VisionResult(1, 100.0, [alice], [], True))
+    for t in range(101, 106):  # no change; deltas are empty
+        fusion.add_vision(VisionResult(1, float(t), [], [], False))
+
+    said = Speech(1, "u1", "hi", 105.0, True, "Alice", start_ts=102.0, end_ts=104.0)
+    assert fusion.attribute(said)[:3] == ("voice_face", 1, "Alice")
+
+    said = Speech(1, "u2", "hi", 105.0, True, "Unknown", start_ts=102.0, end_ts=104.0)
+    assert fusion.attribute(said)[:3] == ("sole_face", 1, "Alice")
+
+    said = Speech(1, "u3", "hi", 105.0, True, "Bob", start_ts=102.0, end_ts=104.0)
+    assert fusion.attribute(said)[:2] == ("off_screen", None)
+
+    fusion.add_vision(VisionResult(1, 106.0, [stranger], [], False))
+    said = Speech(1, "u4", "hi", 108.0, True, "Unknown", start_ts=106.0, end_ts=107.0)
+    assert fusion.attribute(said)[:2] == ("none", None)  # two faces; can't tell
+
+
+def test_fusion_vision_holds_only_so_long():
+    fusion = Fusion(store=EventStore(capacity=100, max_age=100), hold=1.0, min_visible=0.5)
+    fusion.add_vision(VisionResult(1, 100.0, [Face(1, (0, 0, 1, 1), "Alice", 0.9)], [], True))
+    # vision went silent; the snapshot covers 100..101 only, 25% of the utterance
+    said = Speech(1, "u", "hi", 104.0, True, "Alice", start_ts=100.0, end_ts=104.0)
+    attribution = fusion.attribute(said)
+    assert attribution.method == "off_screen"
+    assert attribution.visible[1][1] == 0.25
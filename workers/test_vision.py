@@ -0,0 +1,90 @@
+import pytest
+
+pytest.importorskip("inspireface")
+
+from core.events import Face
+from core.metrics import Metrics
+from workers.vision import VisionWorker
+
+
+@pytest.fixture
+def worker():
+    # only what _result_event touches; no models
+    worker = VisionWorker.__new__(VisionWorker)
+    worker.result_mode = "delta"
+    worker.keyframe_interval = 2.0
+    worker.move_iou = 0.7
+    worker.metrics = Metrics()
+    return worker
+
+
+@pytest.fixture
+def state():
+    return {"sent_tracks": {}, "keyframe_ts": 0.0}
+
+
+def face(track_id, bbox=(0, 0, 100, 100), name="Unknown"):
+    return Face(track_id, bbox, name, 0.0)
+
+
+def event(worker, state, *faces):
+    return worker._result_event(1, 10.0, list(faces), state)
+
+
+def test_first_event_is_a_keyframe(worker, state):
+    result = event(worker, state, face(1))
+    assert result.keyframe
+    assert [f.track_id for f in result.faces] == [1]
+    assert state["sent_tracks"] == {1: ((0, 0, 100, 100), "Unknown")}
+
+
+def test_unchanged_tracks_are_suppressed(worker, state):
+    event(worker, state, face(1))
+    assert event(worker, state, face(1, bbox=(2, 2, 102, 102))) is None  # barely moved
+    assert worker.metrics.snapshot()["counters"]["vision_events_suppressed_total"] == 1
+
+
+def test_new_track_appears(worker, state):
+    event(worker, state, face(1))
+    result = event(worker, state, face(1), face(2, bbox=(200, 0, 300, 100)))
+    assert not result.keyframe
+    assert [f.track_id for f in result.faces] == [2]
+    assert result.removed == []
+
+
+def test_move_below_iou_is_sent(worker, state):
+    event(worker, state, face(1))
+    result = event(worker, state, face(1, bbox=(30, 0, 130, 100)))  # iou ~0.54
+    assert [f.bbox for f in result.faces] == [(30, 0, 130, 100)]
+    # later moves are measured from what was sent, not the first box
+    assert event(worker, state, face(1, bbox=(32, 0, 132, 100))) is None
+
+
+def test_rename_is_sent(worker, state):
+    event(worker, state, face(1))
+    result = event(worker, state, face(1, name="matt"))
+    assert [f.name for f in result.faces] == ["matt"]
+    assert state["sent_tracks"][1][1] == "matt"
+
+
+def test_track_disappearing_is_sent_once(worker, state):
+    event(worker, state, face(1), face(2, bbox=(200, 0, 300, 100)))
+    result = event(worker, state, face(1))
+    assert result.faces == [] and result.removed == [2]
+    assert event(worker, state, face(1)) is None
+
+
+def test_keyframe_resends_everything_after_interval(worker, state):
+    event(worker, state, face(1), face(2, bbox=(200, 0, 300, 100)))
+    assert event(worker, state, face(1), face(2, bbox=(200, 0, 300, 100))) is None
+
+    state["keyframe_ts"] -= worker.keyframe_interval
+    result = event(worker, state, face(1), face(2, bbox=(200, 0, 300, 100)))
+    assert result.keyframe
+    assert [f.track_id for f in result.faces] == [1, 2]
+
+
+def test_full_mode_sends_every_frame(worker, state):
+    worker.result_mode = "full"
+    event(worker, state, face(1))
+    assert event(worker, state, face(1)).keyframe
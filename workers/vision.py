@@ -2,154 +2,577 @@ import multiprocessing as mp
 import os
 import queue
 import time
+from dataclasses import replace
 
 import cv2
 import numpy as np
 
+from core import config, events
 from core.config import FPS
+from core.events import Face, VisionResult
+from core.shared_mem import FrameRing
 from workers.base import IngestionWorker
 from workers.vision_utils.facial_processing.inspireface_processor import (
     InspireFaceProcessor,
 )
 
 
+# decode scale -> imdecode flag; libjpeg scales during the idct so smaller is cheaper
+DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def bbox_iou(a, b) -> float:
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
 class VisionWorker(IngestionWorker):
     def __init__(
         self,
-        input_queue: mp.Queue,
+        input_queue,  # FrameRing or mp.Queue, see VISION_TRANSPORT
         output_queue: mp.Queue,
         vision_command_queue: mp.Queue,
+        status_queue=None,
     ):
-        super().__init__(input_queue, output_queue)
+        super().__init__(input_queue, output_queue, status_queue)
         self.command_queue = vision_command_queue
 
     def setup(self):
         print("[Vision] Worker setting up")
-        self.processor = InspireFaceProcessor()
-        self.processor.session.set_track_lost_recovery_mode(True)
+        with self.startup_phase("inspireface launch"):
+            self.processor = InspireFaceProcessor()
         self.video_writer = None
-        self.active_identities = {}
+        # per websocket session: its own inspireface tracker + the identities of its tracks
+        self.sessions = {}
         self.RECHECK_INTERVAL = 2.0  # seconds between re-verifying identification
+        self.unknown_recheck = config.VISION_UNKNOWN_RECHECK
         self.CONFIDENCE_THRESHOLD = 0.5
+
+        # frame scheduling; latest-frame-wins keeps latency bounded when detection is slow
+        self.latest_frame_only = config.VISION_LATEST_FRAME_ONLY
+        self.max_frame_age = config.VISION_MAX_FRAME_AGE
+        self.stats_interval = config.VISION_STATS_INTERVAL
+
+        # reduced scale decode for detection; full res only for recognition crops
+        self.decode_scale = config.VISION_DECODE_SCALE
+        self.decode_flag = DECODE_FLAGS[self.decode_scale]
+        self.embed_full_res = config.VISION_EMBED_FULL_RES and self.decode_scale > 1
+        self.crop_session = (
+            self.processor.create_crop_session() if self.embed_full_res else None
+        )
+
+        # static scene -> reuse the last detection instead of running the detector again
+        self.motion_gating = config.VISION_MOTION_GATING
+        self.motion_thumb = config.VISION_MOTION_THUMB
+        self.motion_threshold = config.VISION_MOTION_THRESHOLD
+        self.motion_refresh = config.VISION_MOTION_REFRESH
+
+        # what goes on the results queue; most frames only need a small delta
+        self.result_mode = config.VISION_RESULT_MODE
+        self.keyframe_interval = config.VISION_KEYFRAME_INTERVAL
+        self.move_iou = config.VISION_MOVE_IOU
+        self.send_embeddings = config.VISION_SEND_EMBEDDINGS
+        self.stats_ts = time.time()
+        self.stats = {
+            "frames_processed": 0,
+            "frames_skipped": 0,  # drained in favor of a newer frame
+            "frames_stale": 0,  # older than max_frame_age
+            "frames_static": 0,  # detection skipped by motion gating
+            "latency_sum": 0.0,  # arrival -> result put on results queue
+            "latency_max": 0.0,
+        }
+
+        if config.WARMUP_ENABLED:
+            with self.startup_phase("warmup"):
+                self._warmup()
         print("[Vision] Ready")
 
+    def _warmup_frame(self) -> np.ndarray:
+        frame = cv2.imread(config.WARMUP_IMAGE)
+        if frame is not None:
+            return frame
+        cap = cv2.VideoCapture(config.TARGET_VIDEO)
+        ok, frame = cap.read()
+        cap.release()
+        if ok:
+            return frame
+        w, h = config.RESOLUTION
+        return np.random.randint(0, 256, (h, w, 3), dtype=np.uint8)
+
+    def _warmup(self):
+        frame = self._warmup_frame()
+        jpeg = cv2.imencode(".jpg", frame)[1]
+        full = frame
+
+        # throwaway tracker so warmup tracks never leak into a real session
+        tracker = self.processor.create_session()
+        faces = []
+
+        def decode():
+            nonlocal frame
+            frame = cv2.imdecode(jpeg, self.decode_flag)
+
+        def detect():
+            nonlocal faces
+            faces = self.processor.detect_faces(frame, session=tracker)
+
+        def recognize():
+            # full res crop re-detection + face_feature_extract + gallery match, exactly like
+            # a real frame; only possible if the image actually has a face in it
+            if faces:
+                load_full = (lambda: full) if self.embed_full_res else None
+                embs = self._extract_embeddings(frame, faces, tracker, load_full)
+                self.processor.identify_embeddings(embs)
+                return
+            # no face: still warm what doesn't need one (crop detector, gallery matmul)
+            if self.crop_session is not None:
+                h, w = full.shape[:2]
+                crop = np.ascontiguousarray(full[h // 4 : 3 * h // 4, w // 4 : 3 * w // 4])
+                self.crop_session.face_detection(crop)
+            gallery = self.processor.gallery.embeddings
+            if gallery.size:
+                self.processor.identify_embeddings(np.ones((1, gallery.shape[1]), np.float32))
+
+        try:
+            self.run_warmup(
+                {"decode": decode, "detect": detect, "recognize": recognize},
+                config.WARMUP_ITERATIONS,
+            )
+        finally:
+            tracker.release()
+
+        if not faces:
+            message = (
+                f"[Vision] no face found in warmup image {config.WARMUP_IMAGE!r}; "
+                "face_feature_extract is still cold and the first recognized face pays its "
+                "init cost. point WARMUP_IMAGE at a photo with a face"
+            )
+            if config.WARMUP_REQUIRE_FACE:
+                raise RuntimeError(message)
+            print(f"{message} (WARNING)")
+
     def run(self):
         # for now some basic logic about facial recognition; avoids re-recognizing too often
-        self.setup()
+        with self.startup_phase("setup total"):
+            self.setup()
+        self.mark_ready()
 
         try:
             while self.running.is_set():
+                self._handle_commands()
                 try:
-                    raw_bytes = self.input_queue.get(timeout=0.01)
+                    frames = self._next_frames(timeout=0.01)
                 except queue.Empty:
+                    self._maybe_emit_stats()
+                    self.report_metrics()
                     continue
-                frame = cv2.imdecode(
-                    np.frombuffer(raw_bytes, np.uint8), cv2.IMREAD_COLOR
-                )
-                if frame is None:
-                    continue
 
-                # for testing purposes: if we wanna see bounding box behavior
-                # if self.video_writer is None:
-                #     self._init_video_writer(frame)
+                for seq, session, ts, raw_bytes in frames:
+                    self._handle_frame(seq, session, ts, raw_bytes)
+                self._maybe_emit_stats()
+                self.report_metrics()
+
+        finally:
+            print("[Vision] Releasing resources")
+            for state in getattr(self, "sessions", {}).values():
+                state["tracker"].release()
+            if hasattr(self, "processor") and self.processor.session:
+                self.processor.session.release()
+            if getattr(self, "crop_session", None):
+                self.crop_session.release()
+            if self.video_writer:
+                self.video_writer.release()
+                print("[Vision] VideoWriter released")
+            if isinstance(self.input_queue, FrameRing):
+                self.input_queue.close()
+
+    def _handle_frame(self, seq, session, ts, raw_bytes):
+        if session in self.closed_sessions:  # stragglers after disconnect
+            return
+
+        # capture (or arrival) -> picked up here; includes the network hop for client timestamps
+        wait = time.time() - ts
+        self.metrics.observe("vision_queue_wait_seconds", wait)
+
+        # too old to be worth describing; skip the detector entirely
+        if wait > self.max_frame_age:
+            self.stats["frames_stale"] += 1
+            self.metrics.inc("vision_frames_total", labels={"outcome": "stale"})
+            return
+
+        start = time.perf_counter()
+        with self.metrics.timer("vision_decode_seconds"):
+            frame = cv2.imdecode(np.frombuffer(raw_bytes, np.uint8), self.decode_flag)
+        # ring slot got reused while we decoded; frame could be torn (and a torn jpeg
+        # usually fails to decode, so this goes first or it'd be counted as undecodable)
+        if seq is not None and not self.input_queue.is_current(seq):
+            self.metrics.inc("vision_frames_total", labels={"outcome": "torn"})
+            return
+        if frame is None:
+            self.metrics.inc("vision_frames_total", labels={"outcome": "undecodable"})
+            return
+
+        # for testing purposes: if we wanna see bounding box behavior
+        # if self.video_writer is None:
+        #     self._init_video_writer(frame)
+
+        def load_full():
+            # full resolution only gets decoded if some face is actually due for recognition
+            with self.metrics.timer("vision_decode_full_seconds"):
+                full = cv2.imdecode(np.frombuffer(raw_bytes, np.uint8), cv2.IMREAD_COLOR)
+            if seq is not None and not self.input_queue.is_current(seq):
+                return None
+            return full
+
+        if session not in self.sessions:
+            self.sessions[session] = self._new_session_state()
+        state = self.sessions[session]
+        if self._scene_static(frame, state):
+            # same faces as last time; embeddings were already sent with the original result
+            result = [replace(face, emb=None) for face in state["last_result"]]
+            self.stats["frames_static"] += 1
+            self.metrics.inc("vision_detect_skipped_total")
+        else:
+            result = self._process_frame(
+                frame, state, load_full if self.embed_full_res else None
+            )
+            state["last_result"] = result
 
-                raw_detection_faces = self.processor.detect_faces(frame)
+        event = self._result_event(session, ts, result, state)
+        if event is not None:
+            try:
+                self.output_queue.put(events.encode(event))
+                # print("[Vision] added to ouput queue")
+            except queue.Full:
+                print("Queue Full; passing")
+                pass
 
-                result = []
-                current_frame_ids = set()
+        latency = time.time() - ts
+        self.metrics.observe("vision_frame_seconds", time.perf_counter() - start)
+        self.metrics.observe("vision_latency_seconds", latency)
+        self.metrics.inc("vision_frames_total", labels={"outcome": "processed"})
+        self.stats["frames_processed"] += 1
+        self.stats["latency_sum"] += latency
+        self.stats["latency_max"] = max(self.stats["latency_max"], latency)
 
-                for face in raw_detection_faces:
-                    track_id = face.track_id
-                    current_frame_ids.add(track_id)
+    def _result_event(self, session, ts, faces, state):
+        # full mode: every frame is a keyframe. delta mode: only tracks that are new, renamed,
+        # moved or carry a fresh embedding + ids of tracks that went away; None if nothing
+        # changed. keyframes resend everything so a consumer that missed a delta catches up
+        now = time.time()
+        sent = state["sent_tracks"]  # track id -> (bbox, name) as last sent
+        current = {face.track_id for face in faces}
+        removed = [track_id for track_id in sent if track_id not in current]
+        keyframe = (
+            self.result_mode != "delta"
+            or now - state["keyframe_ts"] >= self.keyframe_interval
+        )
+
+        if keyframe:
+            changed = faces
+            state["keyframe_ts"] = now
+        else:
+            changed = [
+                face for face in faces if self._track_changed(sent.get(face.track_id), face)
+            ]
+            if not changed and not removed:
+                self.metrics.inc("vision_events_suppressed_total")
+                return None
+
+        for track_id in removed:
+            del sent[track_id]
+        for face in changed:
+            sent[face.track_id] = (face.bbox, face.name)
+
+        self.metrics.inc(
+            "vision_events_total", labels={"kind": "keyframe" if keyframe else "delta"}
+        )
+        return VisionResult(session, ts, changed, removed, keyframe)
+
+    def _track_changed(self, prev, face) -> bool:
+        if prev is None or face.emb is not None:
+            return True
+        bbox, name = prev
+        return name != face.name or bbox_iou(bbox, face.bbox) < self.move_iou
+
+    def _scene_static(self, frame, state) -> bool:
+        # tiny grayscale thumbnail vs the one from the last frame that went through detection
+        # (not just the previous frame, so a slow pan still adds up to a refresh)
+        if not self.motion_gating:
+            return False
+        with self.metrics.timer("vision_motion_seconds"):
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            thumb = cv2.resize(gray, self.motion_thumb, interpolation=cv2.INTER_AREA)
+
+        now = time.time()
+        ref = state["motion_ref"]
+        if ref is not None and now - state["detect_ts"] < self.motion_refresh:
+            change = float(cv2.absdiff(thumb, ref).mean()) / 255.0
+            if change < self.motion_threshold:
+                return True
+
+        state["motion_ref"] = thumb
+        state["detect_ts"] = now
+        return False
+
+    def _process_frame(self, frame, state, load_full=None) -> list:
+        # frame may be a reduced decode; bboxes in the result are always full res
+        tracker = state["tracker"]
+        active_identities = state["active_identities"]
+        with self.metrics.timer("vision_detect_seconds"):
+            raw_detection_faces = self.processor.detect_faces(frame, session=tracker)
+        self.metrics.inc("vision_faces_total", len(raw_detection_faces))
 
-                    if (
-                        track_id not in self.active_identities
-                    ):  # new box; not previously tracked
-                        self.active_identities[track_id] = {
-                            "name": "Unknown",
-                            "score": 0.0,
-                            "checked_ts": 0,
-                        }
+        current_frame_ids = set()
+        now = time.time()
 
-                    # get our stored data on this guy
-                    identity_data = self.active_identities[track_id]
+        # first pass: update tracks & collect every face due for (re)identification
+        # new tracks & known ones due a recheck get a full res crop; unknown tracks are
+        # retried off the reduced frame so an empty gallery doesn't cost a full decode per frame
+        to_recognize, to_recognize_reduced = [], []
+        for face in raw_detection_faces:
+            track_id = face.track_id
+            current_frame_ids.add(track_id)
 
-                    # determine if we should try to identify him (compare to known people)
-                    now = time.time()
+            if (
+                track_id not in active_identities
+            ):  # new box; not previously tracked
+                active_identities[track_id] = {
+                    "name": "Unknown",
+                    "score": 0.0,
+                    "checked_ts": 0,
+                }
 
-                    emb = None
+            # get our stored data on this guy
+            identity_data = active_identities[track_id]
 
-                    # only do cosine sim if we don't know them or it's been a while since we last checked
-                    should_recognize = (
-                        identity_data["name"] == "Unknown"
-                        or (now - identity_data["checked_ts"]) > self.RECHECK_INTERVAL
+            # only do cosine sim if we don't know them or it's been a while since we last checked
+            since_checked = now - identity_data["checked_ts"]
+            if identity_data["checked_ts"] == 0:
+                to_recognize.append(face)
+            elif identity_data["name"] == "Unknown":
+                if since_checked > self.unknown_recheck:
+                    to_recognize_reduced.append(face)
+            elif since_checked > self.RECHECK_INTERVAL:
+                to_recognize.append(face)
+
+        # second pass: extract all due faces together & match them in one gallery call
+        embeddings = {}
+        if to_recognize or to_recognize_reduced:
+            with self.metrics.timer("vision_embed_seconds"):
+                embs = []
+                if to_recognize:
+                    embs.append(
+                        self._extract_embeddings(frame, to_recognize, tracker, load_full)
                     )
-                    if should_recognize:
-                        emb = self.processor.extract_embedding(frame, face)
-                        name, score = self.processor.identify_embedding(emb)
-
-                        # if strongly looks like someone we know
-                        if score > self.CONFIDENCE_THRESHOLD:
-                            self.active_identities[track_id] = {
-                                "name": name,
-                                "score": score,
-                                "checked_ts": now,
-                            }
-                        else:  # still don't know
-                            self.active_identities[track_id]["checked_ts"] = now
-
-                    # form result to send back to coordinator
-                    x1, y1, x2, y2 = map(int, face.location)
-                    result.append(
-                        {
-                            "track_id": track_id,
-                            "bbox": (x1, y1, x2, y2),
-                            "name": self.active_identities[track_id]["name"],
-                            "score": self.active_identities[track_id]["score"],
-                            "emb": emb,
-                        }
+                if to_recognize_reduced:
+                    embs.append(
+                        self._extract_embeddings(frame, to_recognize_reduced, tracker)
                     )
+                embs = np.concatenate(embs)
+            to_recognize += to_recognize_reduced
+            with self.metrics.timer("vision_identify_seconds"):
+                matches = self.processor.identify_embeddings(embs)
+            self.metrics.inc("vision_recognitions_total", len(to_recognize))
+            for face, emb, (name, score) in zip(to_recognize, embs, matches):
+                embeddings[face.track_id] = emb
 
-                    if self.video_writer:
-                        current_name = self.active_identities[track_id]["name"]
-                        label_text = f"{current_name} (ID: {track_id})"
-                        self._draw_face_label(frame, (x1, y1, x2, y2), label_text)
-
-                if self.video_writer:
-                    self.video_writer.write(frame)
+                # if strongly looks like someone we know
+                if score > self.CONFIDENCE_THRESHOLD:
+                    active_identities[face.track_id] = {
+                        "name": name,
+                        "score": score,
+                        "checked_ts": now,
+                    }
+                else:  # still don't know
+                    active_identities[face.track_id]["checked_ts"] = now
 
-                # remove expired ids (untracked for a while)
-                expired_ids = [
-                    track_id
-                    for track_id in self.active_identities
-                    if track_id not in current_frame_ids
-                ]
-                for track_id in expired_ids:
-                    del self.active_identities[track_id]
+        result = []
+        for face in raw_detection_faces:
+            track_id = face.track_id
 
-                try:
-                    self.output_queue.put({"type": "vision_result", "faces": result})
-                    # print("[Vision] added to ouput queue")
-                except queue.Full:
-                    print("Queue Full; passing")
-                    pass
+            # form result to send back to coordinator
+            x1, y1, x2, y2 = map(int, face.location)
+            result.append(
+                Face(
+                    track_id,
+                    tuple(int(v * self.decode_scale) for v in face.location),
+                    active_identities[track_id]["name"],
+                    float(active_identities[track_id]["score"]),
+                    # only when asked for; they're most of the bytes in an event
+                    embeddings.get(track_id) if self.send_embeddings else None,
+                )
+            )
 
-        finally:
-            print("[Vision] Releasing resources")
-            if hasattr(self, "processor") and self.processor.session:
-                self.processor.session.release()
             if self.video_writer:
-                self.video_writer.release()
-                print("[Vision] VideoWriter released")
+                current_name = active_identities[track_id]["name"]
+                label_text = f"{current_name} (ID: {track_id})"
+                self._draw_face_label(frame, (x1, y1, x2, y2), label_text)
+
+        if self.video_writer:
+            self.video_writer.write(frame)
+
+        # remove expired ids (untracked for a while)
+        expired_ids = [
+            track_id
+            for track_id in active_identities
+            if track_id not in current_frame_ids
+        ]
+        for track_id in expired_ids:
+            del active_identities[track_id]
+
+        return result
+
+    def _extract_embeddings(self, frame, faces, tracker, load_full=None) -> np.ndarray:
+        # with a reduced decode each face is re-found in a full res crop so the embedding
+        # doesn't lose detail; faces that can't be re-found fall back to the reduced frame
+        embs = [None] * len(faces)
+        full = load_full() if load_full is not None else None
+        if full is not None:
+            boxes = [np.asarray(face.location) * self.decode_scale for face in faces]
+            embs = self.processor.extract_embeddings_from_crops(full, boxes, self.crop_session)
+
+        missing = [i for i, emb in enumerate(embs) if emb is None]
+        if missing:
+            if full is not None:
+                self.metrics.inc("vision_crop_fallbacks_total", len(missing))
+            fallback = self.processor.extract_embeddings(
+                frame, [faces[i] for i in missing], session=tracker
+            )
+            for i, emb in zip(missing, fallback):
+                embs[i] = emb
+        return np.stack(embs)
+
+    def _next_payload(self, timeout):
+        # returns (seq, session, arrival ts, buffer)
+        # shared mem ring hands back a view into the slot (no copy); queue hands back bytes
+        if isinstance(self.input_queue, FrameRing):
+            return self.input_queue.get(timeout=timeout)
+        if timeout == 0:
+            session, ts, raw_bytes = self.input_queue.get_nowait()
+        else:
+            session, ts, raw_bytes = self.input_queue.get(timeout=timeout)
+        return None, session, ts, raw_bytes
+
+    def _next_frames(self, timeout) -> list:
+        # blocks for one frame; in latest-frame mode only the newest frame per session is
+        # kept so one busy stream can't starve the others
+        if not self.latest_frame_only:
+            return [self._next_payload(timeout)]
+
+        if isinstance(self.input_queue, FrameRing):
+            # ring jumps to its head; only slot headers are read for the frames skipped
+            frames, skipped = self.input_queue.get_latest(timeout=timeout)
+            self._count_skipped(skipped)
+            # the first frame is decoded right away, straight from its slot; the others wait
+            # behind its detection while the writer keeps going, so they get their own copy
+            held = [self._own_payload(item) for item in frames[1:]]
+            return [frames[0], *(item for item in held if item is not None)]
+
+        newest = {}
+        item = self._next_payload(timeout)
+        while True:
+            if item[1] in newest:
+                self._count_skipped(1)
+            newest[item[1]] = item
+            try:
+                item = self._next_payload(timeout=0)
+            except queue.Empty:
+                break
+        return list(newest.values())
+
+    def _count_skipped(self, n):
+        if n:
+            self.stats["frames_skipped"] += n
+            self.metrics.inc("vision_frames_total", n, labels={"outcome": "skipped"})
+
+    def _own_payload(self, item):
+        # copy of a ring frame that's held while another session is processed; None if the
+        # slot was already reused before or during the copy
+        seq, session, ts, view = item
+        raw_bytes = bytes(view)
+        if not self.input_queue.is_current(seq):
+            self.metrics.inc("vision_frames_total", labels={"outcome": "torn"})
+            return None
+        return None, session, ts, raw_bytes
+
+    def report_metrics(self, force=False):
+        if isinstance(self.input_queue, FrameRing):
+            # ring counts these itself, cumulative already
+            self.metrics.counters["vision_ring_overwritten_total"] = self.input_queue.overwritten
+        self.metrics.set("vision_sessions", len(self.sessions))
+        super().report_metrics(force)
+
+    def _maybe_emit_stats(self):
+        now = time.time()
+        if now - self.stats_ts < self.stats_interval:
+            return
+        processed = self.stats["frames_processed"]
+        stats = {
+            "type": "vision_stats",
+            "frames_processed": processed,
+            "frames_skipped": self.stats["frames_skipped"],
+            "frames_stale": self.stats["frames_stale"],
+            "frames_static": self.stats["frames_static"],
+            "latency_avg": self.stats["latency_sum"] / processed if processed else 0.0,
+            "latency_max": self.stats["latency_max"],
+        }
+        if isinstance(self.input_queue, FrameRing):
+            stats["frames_overwritten"] = self.input_queue.overwritten
+        self.output_queue.put(stats)
+
+        # counters are per interval
+        self.stats = dict.fromkeys(self.stats, 0)
+        self.stats_ts = now
 
     def _get_active_commands(self) -> list:
         commands = []
         while not self.command_queue.empty():
-            commands.append(self.command_queue.get_nowait())
+            try:
+                commands.append(self.command_queue.get_nowait())
+            except queue.Empty:
+                break
 
         # deal with registering face for instance
         return commands
 
+    def _handle_commands(self):
+        for command in self._get_active_commands():
+            if command.get("type") == "close_session":
+                self._close_session(command["session"])
+            elif command.get("type") == "send_embeddings":
+                self.send_embeddings = command["enabled"]
+
+    def _new_session_state(self) -> dict:
+        tracker = self.processor.create_session()
+        tracker.set_track_lost_recovery_mode(True)
+        return {
+            "tracker": tracker,
+            "active_identities": {},
+            # motion gating: thumbnail & time of the last detected frame + what it found
+            "motion_ref": None,
+            "detect_ts": 0.0,
+            "last_result": [],
+            # delta results: what the consumer was last told about each track
+            "sent_tracks": {},
+            "keyframe_ts": 0.0,
+        }
+
+    def _close_session(self, session):
+        # headset disconnected; free its tracker
+        self._mark_closed(session)
+        state = self.sessions.pop(session, None)
+        if state is not None:
+            state["tracker"].release()
+
     def _init_video_writer(
         self, frame, output_path="workers/vision_utils/annotated_video.mp4", fps=FPS
     ):
@@ -0,0 +1,162 @@
+import time
+
+import numpy as np
+
+UNKNOWN = "Unknown"
+REMOVED = -1  # name id for tombstoned rows
+
+
+class FaceGallery:
+    # every known embedding in one normalized float32 matrix + an array mapping rows to people
+    # matching is one matmul + argmax instead of a python loop of feature_comparison calls
+    # with a GalleryStore the matrix is a memmap of the on-disk rows, so it survives restarts
+    # and is shared between vision processes through the page cache
+
+    def __init__(self, capacity=256, store=None, refresh_interval=1.0):
+        self.names = []  # name id -> name
+        self._name_to_id = {}
+        self._capacity = capacity
+        self._emb = None  # (capacity, dim) in memory, or (rows, dim) memmap with a store
+        self._name_ids = np.empty(capacity, dtype=np.int32)
+        self._count = 0
+        self._removed = 0
+
+        self._store = store
+        self._store_version = False  # store.version() returns None before anything is saved
+        self._refresh_interval = refresh_interval
+        self._refreshed_ts = 0.0
+        if store is not None:
+            self.refresh(force=True)
+
+    def __len__(self):
+        return self._count - self._removed
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        if self._emb is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._emb[: self._count]
+
+    @property
+    def name_ids(self) -> np.ndarray:
+        return self._name_ids[: self._count]
+
+    def _name_id(self, name: str) -> int:
+        if name not in self._name_to_id:
+            self._name_to_id[name] = len(self.names)
+            self.names.append(name)
+        return self._name_to_id[name]
+
+    def refresh(self, force=False):
+        # pick up rows another process appended/removed; cheap stat when nothing changed
+        if self._store is None:
+            return
+        now = time.time()
+        if not force and now - self._refreshed_ts < self._refresh_interval:
+            return
+        self._refreshed_ts = now
+        version = self._store.version()
+        if version == self._store_version:
+            return
+        self._store_version = version
+
+        rows, row_names = self._store.load()
+        self._emb = rows
+        self._count = len(row_names)
+        self._capacity = max(self._count, 1)
+        self._name_ids = np.array(
+            [REMOVED if name is None else self._name_id(name) for name in row_names],
+            dtype=np.int32,
+        ).reshape(-1)
+        self._removed = int((self._name_ids == REMOVED).sum())
+
+    def add(self, name: str, embedding: np.ndarray):
+        emb = _normalize(np.asarray(embedding, dtype=np.float32).reshape(-1))
+        if self._store is not None:
+            # rows are stored normalized so the memmap can be matched against directly
+            self._store.append(name, emb)
+            self.refresh(force=True)
+            return
+
+        if self._emb is None:
+            self._emb = np.empty((self._capacity, emb.shape[0]), dtype=np.float32)
+        elif emb.shape[0] != self._emb.shape[1]:
+            raise ValueError(
+                f"embedding dim {emb.shape[0]} doesn't match gallery dim {self._emb.shape[1]}"
+            )
+        if self._count == self._capacity:
+            self._grow()
+
+        self._emb[self._count] = emb
+        self._name_ids[self._count] = self._name_id(name)
+        self._count += 1
+
+    def remove(self, name: str) -> int:
+        # tombstones the person's rows; returns how many were removed
+        if self._store is not None:
+            removed = self._store.remove(name)
+            self.refresh(force=True)
+            return removed
+        if name not in self._name_to_id:
+            return 0
+        rows = self.name_ids == self._name_to_id[name]
+        self._name_ids[: self._count][rows] = REMOVED
+        removed = int(rows.sum())
+        self._removed += removed
+        return removed
+
+    def _grow(self):
+        # double so incremental registering stays amortized O(1)
+        self._capacity *= 2
+        emb = np.empty((self._capacity, self._emb.shape[1]), dtype=np.float32)
+        emb[: self._count] = self._emb[: self._count]
+        name_ids = np.empty(self._capacity, dtype=np.int32)
+        name_ids[: self._count] = self._name_ids[: self._count]
+        self._emb, self._name_ids = emb, name_ids
+
+    def scores(self, embeddings: np.ndarray) -> np.ndarray:
+        # cosine sim of each query (k, dim) against every stored row -> (k, rows)
+        queries = _normalize(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+        scores = queries @ self.embeddings.T
+        if self._removed:
+            scores[:, self.name_ids == REMOVED] = -np.inf
+        return scores
+
+    def person_scores(self, embeddings: np.ndarray) -> np.ndarray:
+        # max-pool row scores per person -> (k, people)
+        scores = self.scores(embeddings)
+        live = self.name_ids != REMOVED
+        pooled = np.full((scores.shape[0], len(self.names)), -np.inf, dtype=np.float32)
+        np.maximum.at(pooled, (slice(None), self.name_ids[live]), scores[:, live])
+        return pooled
+
+    def match(self, embeddings: np.ndarray, threshold: float):
+        # best person for every query; returns [(name, score), ...]
+        # below threshold comes back as (Unknown, 0.0) to match the old identify_embedding
+        self.refresh()
+        if len(self) == 0:
+            return [(UNKNOWN, 0.0)] * len(np.atleast_2d(embeddings))
+
+        scores = self.scores(embeddings)
+        best_rows = scores.argmax(axis=1)  # max over rows == max over per-person max
+        best_scores = scores[np.arange(scores.shape[0]), best_rows]
+        return [
+            (self.names[self._name_ids[row]], float(score))
+            if score > threshold
+            else (UNKNOWN, 0.0)
+            for row, score in zip(best_rows, best_scores)
+        ]
+
+    def compare_to_person(self, name: str, embedding: np.ndarray) -> float:
+        self.refresh()
+        if name not in self._name_to_id or len(self) == 0:
+            return 0.0
+        rows = self.name_ids == self._name_to_id[name]
+        if not rows.any():
+            return 0.0
+        return max(float(self.scores(embedding)[0, rows].max()), 0.0)
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
@@ -0,0 +1,105 @@
+import json
+import os
+
+import numpy as np
+
+EMBEDDINGS_FILE = "embeddings.f32"
+INDEX_FILE = "index.json"
+
+
+class GalleryStore:
+    # face gallery on disk: append-only raw float32 rows + a small json index of row -> name
+    # workers memmap the rows so startup doesn't read the whole thing and every vision
+    # process shares one copy through the page cache
+    # removing someone only tombstones their rows in the index; embeddings never get rewritten
+    # until compact() is called
+    # assumes one writer at a time (whoever handles registration); readers just refresh()
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.embeddings_path = os.path.join(directory, EMBEDDINGS_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        os.makedirs(directory, exist_ok=True)
+
+    def version(self):
+        # index gets replaced on every change, so its stat tells readers to reload
+        try:
+            st = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"dim": None, "rows": []}
+
+    def _write_index(self, index: dict):
+        # write then rename so readers never see half an index
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp, self.index_path)
+
+    def load(self):
+        # returns (rows memmap (n, dim) read-only, names per row; None for removed rows)
+        index = self._read_index()
+        names = index["rows"]
+        if not names:
+            return None, []
+        rows = np.memmap(
+            self.embeddings_path,
+            dtype=np.float32,
+            mode="r",
+            shape=(len(names), index["dim"]),
+        )
+        return rows, names
+
+    def append(self, name: str, embedding: np.ndarray):
+        row = np.ascontiguousarray(embedding, dtype=np.float32).reshape(-1)
+        index = self._read_index()
+        if index["dim"] is None:
+            index["dim"] = row.shape[0]
+        elif row.shape[0] != index["dim"]:
+            raise ValueError(
+                f"embedding dim {row.shape[0]} doesn't match stored dim {index['dim']}"
+            )
+
+        # index is the source of truth; drop any tail left over from a crashed append
+        with open(self.embeddings_path, "ab") as f:
+            f.truncate(len(index["rows"]) * index["dim"] * 4)
+            f.write(row.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        index["rows"].append(name)
+        self._write_index(index)
+
+    def remove(self, name: str) -> int:
+        # tombstone every row belonging to name; returns how many were removed
+        index = self._read_index()
+        removed = 0
+        for i, row_name in enumerate(index["rows"]):
+            if row_name == name:
+                index["rows"][i] = None
+                removed += 1
+        if removed:
+            self._write_index(index)
+        return removed
+
+    def compact(self):
+        # rewrite without tombstoned rows; only worth it after lots of removals
+        # embeddings and index can't be swapped atomically together, so run with workers stopped
+        rows, names = self.load()
+        if rows is None:
+            return
+        keep = [i for i, name in enumerate(names) if name is not None]
+        tmp = self.embeddings_path + ".tmp"
+        np.ascontiguousarray(rows[keep]).tofile(tmp)
+        del rows
+        os.replace(tmp, self.embeddings_path)
+        self._write_index(
+            {"dim": self._read_index()["dim"], "rows": [names[i] for i in keep]}
+        )
@@ -3,6 +3,8 @@ import numpy as np
 from inspireface import FaceInformation
 
 from core import config
+from workers.vision_utils.facial_processing.face_gallery import FaceGallery
+from workers.vision_utils.facial_processing.gallery_store import GalleryStore
 
 
 class InspireFaceProcessor:
@@ -12,12 +14,17 @@ class InspireFaceProcessor:
         model_path=None,
         confidence_threshold=config.CONFIDENCE_THRESHOLD_DETECTION,
         download_model=False,
+        gallery_dir=None,
     ):
         if model_path is None:
             model_path = config.get_model_path(model_type)
 
         self.session = None
-        self.known_faces = {}  # map for now; we can remove this and make it a db later if known faces is to grow larger
+        # every known embedding in one matrix; matched with a matmul
+        # backed by an on-disk store so registered people survive restarts
+        gallery_dir = config.FACE_GALLERY_DIR if gallery_dir is None else gallery_dir
+        store = GalleryStore(gallery_dir) if gallery_dir else None
+        self.gallery = FaceGallery(store=store)
 
         self._initialize_model(
             model_type, model_path, confidence_threshold, download_model
@@ -45,16 +52,31 @@ class InspireFaceProcessor:
                 "InspireFace launch failed; likely given an invalid model path"
             )
 
-        params = isf.SessionCustomParameter(
+        self.params = isf.SessionCustomParameter(
             enable_recognition=True,
             enable_face_emotion=True,
             enable_face_attribute=False,  # age & gender & whatnot
             enable_liveness=False,  # interesting parameter: to differentiate a physical picture of someone vs real person
         )
-        self.session = isf.InspireFaceSession(params)
-        self.session.set_detection_confidence_threshold(confidence_threshold)
+        self.confidence_threshold = confidence_threshold
+        self.session = self.create_session()
         print("[Vision] InspireFace Model initialized")
 
+    def create_session(self):
+        # each session has its own tracker state; one per video stream so track ids from
+        # different headsets never mix. caller releases it
+        session = isf.InspireFaceSession(self.params)
+        session.set_detection_confidence_threshold(self.confidence_threshold)
+        return session
+
+    def create_crop_session(self):
+        # stateless detector for re-finding a face inside a crop; no tracking between calls
+        session = isf.InspireFaceSession(
+            self.params, detect_mode=isf.HF_DETECT_MODE_ALWAYS_DETECT
+        )
+        session.set_detection_confidence_threshold(self.confidence_threshold)
+        return session
+
     def register_identity(self, name: str, embedding: np.ndarray):
         if embedding is None:
             print(f"[Vision][Identity] Failed to register '{name}': embedding is None")
@@ -62,36 +84,59 @@ class InspireFaceProcessor:
         if not isinstance(embedding, np.ndarray):
             print(f"[Vision][Identity] Failed to register '{name}': embedding is is not np array")
             return
-        if name not in self.known_faces:
-            self.known_faces[name] = []
-        self.known_faces[name].append(embedding)
+        self.gallery.add(name, embedding)
 
-    def detect_faces(self, image: np.ndarray):
-        return self.session.face_detection(image)
+    def detect_faces(self, image: np.ndarray, session=None):
+        return (session or self.session).face_detection(image)
 
-    def extract_embedding(self, image: np.ndarray, face_obj: FaceInformation):
-        return self.session.face_feature_extract(image, face_obj)
+    def extract_embedding(self, image: np.ndarray, face_obj: FaceInformation, session=None):
+        return (session or self.session).face_feature_extract(image, face_obj)
 
-    def compare_to_person(self, name: str, embedding: np.ndarray):
-        if name not in self.known_faces:
-            return 0.0
+    def extract_embeddings(self, image: np.ndarray, face_objs: list, session=None) -> np.ndarray:
+        # (k, dim) for every face; inspireface only exposes per-face extraction, so this
+        # loops in C calls but hands back one array so matching can be done in one shot
+        if not face_objs:
+            return np.empty((0, 0), dtype=np.float32)
+        session = session or self.session
+        return np.stack([session.face_feature_extract(image, face) for face in face_objs])
 
-        best_comp = 0.0
-        for known_features in self.known_faces[name]:
-            score = isf.feature_comparison(embedding, known_features)
-            best_comp = max(best_comp, score)
-        return best_comp
+    def extract_embeddings_from_crops(
+        self, image: np.ndarray, boxes: list, session, pad=config.VISION_CROP_PAD
+    ) -> list:
+        # boxes are (x1, y1, x2, y2) in image coords, e.g. detections from a reduced decode
+        # scaled back up; each gets padded, cropped & re-detected so the embedding is taken
+        # from full resolution pixels. None for a box where no face turns up in the crop
+        h, w = image.shape[:2]
+        embeddings = []
+        for x1, y1, x2, y2 in boxes:
+            pad_x, pad_y = (x2 - x1) * pad, (y2 - y1) * pad
+            cx1, cy1 = max(0, int(x1 - pad_x)), max(0, int(y1 - pad_y))
+            cx2, cy2 = min(w, int(x2 + pad_x)), min(h, int(y2 + pad_y))
+            if cx2 <= cx1 or cy2 <= cy1:
+                embeddings.append(None)
+                continue
+            crop = np.ascontiguousarray(image[cy1:cy2, cx1:cx2])
+            faces = session.face_detection(crop)
+            if not faces:
+                embeddings.append(None)
+                continue
+            # the padded crop can catch a neighbour's edge; the face we want is the big one
+            face = max(
+                faces,
+                key=lambda f: (f.location[2] - f.location[0]) * (f.location[3] - f.location[1]),
+            )
+            embeddings.append(session.face_feature_extract(crop, face))
+        return embeddings
+
+    def compare_to_person(self, name: str, embedding: np.ndarray):
+        return self.gallery.compare_to_person(name, embedding)
 
     def identify_embedding(self, embedding: np.ndarray, threshold=config.CONFIDENCE_THRESHOLD_MATCHING):
         # given embedding, compare to known faces and return best match name and according score
-        best_score = 0.0
-        best_match = "Unknown"
-
-        if self.known_faces:
-            for name, _ in self.known_faces.items():
-                score = self.compare_to_person(name, embedding)
-                if score > threshold and score > best_score:
-                    best_score = score
-                    best_match = name
+        return self.gallery.match(embedding, threshold)[0]
 
-        return best_match, best_score
+    def identify_embeddings(self, embeddings: np.ndarray, threshold=config.CONFIDENCE_THRESHOLD_MATCHING):
+        # batched identify_embedding; one matmul against the gallery for the whole frame
+        if len(embeddings) == 0:
+            return []
+        return self.gallery.match(embeddings, threshold)
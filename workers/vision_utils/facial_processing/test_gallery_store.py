@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from workers.vision_utils.facial_processing.face_gallery import FaceGallery
+from workers.vision_utils.facial_processing.gallery_store import GalleryStore
+
+
+def unit(i, dim=8):
+    row = np.zeros(dim, np.float32)
+    row[i] = 1.0
+    return row
+
+
+def test_rows_survive_reopen(tmp_path):
+    store = GalleryStore(str(tmp_path))
+    store.append("alice", unit(0))
+    store.append("bob", unit(1))
+
+    rows, names = GalleryStore(str(tmp_path)).load()
+    assert names == ["alice", "bob"]
+    np.testing.assert_array_equal(rows, np.stack([unit(0), unit(1)]))
+
+
+def test_append_drops_tail_left_by_a_crash(tmp_path):
+    store = GalleryStore(str(tmp_path))
+    store.append("alice", unit(0))
+    # crashed mid append: half a row written, index never updated
+    with open(store.embeddings_path, "ab") as f:
+        f.write(unit(5).tobytes()[:12])
+
+    rows, names = store.load()
+    assert names == ["alice"] and rows.shape == (1, 8)
+
+    store.append("bob", unit(1))
+    rows, names = store.load()
+    assert names == ["alice", "bob"]
+    np.testing.assert_array_equal(rows[1], unit(1))
+
+
+def test_leftover_index_tmp_is_ignored(tmp_path):
+    store = GalleryStore(str(tmp_path))
+    store.append("alice", unit(0))
+    # crashed between writing the new index & renaming it over the old one
+    with open(store.index_path + ".tmp", "w") as f:
+        f.write('{"dim": 8, "rows": ["alice", "gho')
+
+    assert store.load()[1] == ["alice"]
+    store.append("bob", unit(1))
+    assert store.load()[1] == ["alice", "bob"]
+
+
+def test_dim_mismatch_is_rejected(tmp_path):
+    store = GalleryStore(str(tmp_path))
+    store.append("alice", unit(0))
+    with pytest.raises(ValueError):
+        store.append("bob", np.ones(4, np.float32))
+
+
+def test_remove_tombstones_and_compact_drops_them(tmp_path):
+    store = GalleryStore(str(tmp_path))
+    for i, name in enumerate(["alice", "bob", "alice"]):
+        store.append(name, unit(i))
+
+    assert store.remove("alice") == 2
+    assert store.load()[1] == [None, "bob", None]
+
+    store.compact()
+    rows, names = store.load()
+    assert names == ["bob"]
+    np.testing.assert_array_equal(rows, unit(1)[None])
+
+
+def test_gallery_picks_up_other_writers(tmp_path):
+    reader = FaceGallery(store=GalleryStore(str(tmp_path)), refresh_interval=0.0)
+    assert reader.match(unit(0)[None], threshold=0.5) == [("Unknown", 0.0)]
+
+    GalleryStore(str(tmp_path)).append("alice", unit(0))
+    assert reader.match(unit(0)[None], threshold=0.5)[0][0] == "alice"